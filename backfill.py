@@ -0,0 +1,198 @@
+"""Догоняющий проход по истории работ одним потоковым запросом.
+
+Восстанавливает состояние уведомлений для нового подписчика или
+после потери базы: python backfill.py --since 1672531200 [--notify]
+"""
+import argparse
+import os
+import sys
+
+import telegram
+
+import homework
+import shutdown
+import state
+import transport
+from exceptions import ErrorEnv, ErrorResponseData, ErrorStatus
+from ratelimit import TokenBucket
+
+BACKFILL_BATCH = int(os.getenv('BACKFILL_BATCH', 100))
+BACKFILL_RATE = float(os.getenv('BACKFILL_RATE', 0.5))
+BACKFILL_NOTIFY = os.getenv('BACKFILL_NOTIFY', '').lower() in (
+    '1', 'true', 'yes'
+)
+PROGRESS_SUFFIX = ':backfill'
+
+logger = homework.logger.getChild('backfill')
+
+
+class Backfill:
+    """Проход истории подписчика от отметки since до текущего момента.
+
+    API принимает только from_date, поэтому история читается одним
+    запросом с потоковым разбором. В памяти остаются только работы,
+    статус которых отличается от записанного, по три поля на работу.
+    Записываются они после проверки всего ответа, от старых к новым;
+    каждые batch работ отметка прохода сохраняется в хранилище,
+    и прерванный проход запрашивает историю уже с неё.
+    notify(tenant, message) получает сообщения об изменениях;
+    без него статусы записываются молча.
+    """
+
+    def __init__(self, store: state.StateStore,
+                 batch: int = BACKFILL_BATCH, rate: float = BACKFILL_RATE,
+                 notify=None):
+        if batch <= 0:
+            raise ErrorEnv('BACKFILL_BATCH должен быть больше нуля')
+        self.store = store
+        self.batch = batch
+        self.limiter = TokenBucket(rate)
+        self.notify = notify
+
+    @staticmethod
+    def progress_key(tenant) -> str:
+        """Ключ отметки прохода в хранилище рядом с отметкой опроса."""
+        return tenant.key + PROGRESS_SUFFIX
+
+    def fetch_changes(self, tenant, since: int) -> tuple:
+        """Изменившиеся работы от старых к новым и current_date ответа.
+
+        Каждая работа проверяется по мере чтения, некорректные
+        пропускаются; поля верхнего уровня проверяются в конце,
+        до этого ничего не записывается.
+        """
+        self.limiter.acquire()
+        parser = homework.stream_homeworks(since, tenant.headers)
+        changes = []
+        for work in parser:
+            try:
+                homework.VALIDATORS.homework(work)
+            except (ErrorResponseData, ErrorStatus) as error:
+                homework.skip_homework(error)
+                continue
+            if self.store.get_status(
+                    tenant.key, work['homework_name']) != work['status']:
+                changes.append(work)
+        homework.check_response(parser.fields)
+        changes.sort(key=lambda work: state.parse_date(
+            work.get('date_updated')
+        ))
+        return changes, parser.fields['current_date']
+
+    def commit(self, tenant, changes: list) -> int:
+        """Записываем изменения; возвращаем, сколько успели до сигнала."""
+        key = self.progress_key(tenant)
+        for number, work in enumerate(changes, 1):
+            message = homework.record_change(work, self.store, tenant.key,
+                                             tenant.locale)
+            if message is not None and self.notify is not None:
+                self.notify(tenant, message)
+            if number % self.batch and number < len(changes):
+                continue
+            self.store.set_checkpoint(
+                key, state.parse_date(work.get('date_updated'))
+            )
+            if shutdown.STOP.is_set() and number < len(changes):
+                logger.warning('%s: проход прерван, записано %d из %d',
+                               tenant.key, number, len(changes))
+                return number
+        return len(changes)
+
+    def run(self, tenant, since: int, restart: bool = False) -> int:
+        """Проход подписчика, возвращаем число новых статусов.
+
+        Без restart проход продолжается с сохранённой отметки.
+        Обычный опрос без своей отметки начнётся с конца прохода.
+        """
+        key = self.progress_key(tenant)
+        saved = None if restart else self.store.get_checkpoint(key)
+        changes, current_date = self.fetch_changes(tenant, saved or since)
+        done = self.commit(tenant, changes)
+        if done < len(changes):
+            return done
+        self.store.set_checkpoint(key, current_date)
+        if self.store.get_checkpoint(tenant.key) is None:
+            self.store.set_checkpoint(tenant.key, current_date)
+        logger.info('%s: история пройдена, новых статусов: %d',
+                    tenant.key, done)
+        return done
+
+
+def parse_args(argv=None):
+    """Аргументы командной строки, по умолчанию из окружения."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--since', type=int, required=True,
+                        help='начало истории, секунды эпохи')
+    parser.add_argument('--batch', type=int, default=BACKFILL_BATCH,
+                        help='работ между сохранениями отметки прохода')
+    parser.add_argument('--rate', type=float, default=BACKFILL_RATE,
+                        help='запросов к API в секунду')
+    parser.add_argument('--notify', action='store_true',
+                        default=BACKFILL_NOTIFY,
+                        help='отправлять сообщения о найденных статусах')
+    parser.add_argument('--restart', action='store_true',
+                        help='начать заново, не продолжая прерванный проход')
+    return parser.parse_args(argv)
+
+
+def run_all(backfill: Backfill, registry, since: int,
+            restart: bool = False):
+    """Проход всех подписчиков; сбой одного не останавливает остальных."""
+    for tenant in registry:
+        try:
+            backfill.run(tenant, since, restart)
+        except Exception as error:
+            logger.error('%s: проход остановлен, повторный запуск '
+                         'продолжит его: %s', tenant.key, error)
+
+
+def flush_outbox(outbox):
+    """Дожидаемся отправки очереди: статусы уже записаны как сообщённые.
+
+    Без сигнала ждём сколько нужно, после сигнала — до срока остановки.
+    """
+    if shutdown.STOP.is_set():
+        outbox.stop(shutdown.deadline().remaining())
+    else:
+        outbox.stop()
+    left = len(outbox)
+    if left:
+        logger.warning('Не успели отправить сообщений: %d', left)
+
+
+def main(argv=None):
+    """Проход по истории всех подписчиков из TENANTS_FILE или окружения."""
+    from engine import build_registry
+    from outbox import Outbox
+
+    args = parse_args(argv)
+    try:
+        registry = build_registry()
+        if args.notify and not homework.TELEGRAM_TOKEN:
+            raise ErrorEnv('Не определена(ы) переменная(ые): TELEGRAM_TOKEN')
+        backfill = Backfill(
+            state.open_store(homework.STATE_PATH, homework.HOMEWORK_VERDICTS),
+            args.batch, args.rate
+        )
+    except ErrorEnv as error:
+        logger.critical(error)
+        sys.exit(1)
+
+    outbox = None
+    if args.notify:
+        outbox = Outbox(telegram.Bot(token=homework.TELEGRAM_TOKEN)).start()
+        backfill.notify = lambda tenant, message: outbox.put(tenant.chat_id,
+                                                             message)
+
+    transport.set_session(transport.create_session())
+    shutdown.install()
+    try:
+        run_all(backfill, registry, args.since, args.restart)
+    finally:
+        if outbox is not None:
+            flush_outbox(outbox)
+        backfill.store.close()
+
+
+if __name__ == '__main__':
+    main()
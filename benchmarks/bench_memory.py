@@ -0,0 +1,83 @@
+"""Память на одну отслеживаемую работу: сырые словари и HomeworkTable.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_memory.py --tenants 10000 --homeworks 20
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state import HomeworkTable  # noqa: E402
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def raw_homework(tenant: int, number: int) -> dict:
+    """Работа в том виде, в каком её возвращает API."""
+    return {
+        'id': tenant * 1000 + number,
+        'status': STATUSES[number % 3],
+        'homework_name': f'user{tenant}__hw{number:02d}.zip',
+        'reviewer_comment': 'Всё нравится',
+        'date_updated': '2020-02-13T14:40:57Z',
+        'lesson_name': f'Урок {number}',
+    }
+
+
+def measure(build) -> int:
+    """Прирост памяти на построение структуры, байт."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return after - before
+
+
+def build_raw(tenants: int, homeworks: int):
+    """Словарь словарей: подписчик → название → ответ API."""
+    return {
+        f'tenant{tenant:08d}': {
+            item['homework_name']: item
+            for item in (raw_homework(tenant, number)
+                         for number in range(homeworks))
+        }
+        for tenant in range(tenants)
+    }
+
+
+def build_table(tenants: int, homeworks: int):
+    """HomeworkTable с теми же работами."""
+    table = HomeworkTable(STATUSES)
+    for tenant in range(tenants):
+        key = f'tenant{tenant:08d}'
+        for number in range(homeworks):
+            item = raw_homework(tenant, number)
+            table.set(key, item['homework_name'], item['status'],
+                      1581604857)
+    return table
+
+
+def main():
+    """Замер и вывод байт на работу."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=10000)
+    parser.add_argument('--homeworks', type=int, default=20)
+    args = parser.parse_args()
+    total = args.tenants * args.homeworks
+
+    raw = measure(lambda: build_raw(args.tenants, args.homeworks))
+    table = measure(lambda: build_table(args.tenants, args.homeworks))
+    print(f'работ: {total}')
+    print(f'сырые словари: {raw / total:8.1f} байт на работу')
+    print(f'HomeworkTable: {table / total:8.1f} байт на работу '
+          f'({raw / table:.1f}x меньше)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Бенчмарк цепочки опрос → разбор → уведомление на локальной заглушке.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_pipeline.py --tenants 1 100 10000
+
+Результаты сохраняются в JSON; с --compare выводится разница
+с сохранёнными ранее результатами.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import telegram  # noqa: E402
+
+import engine  # noqa: E402
+import homework  # noqa: E402
+import scheduler  # noqa: E402
+import transport  # noqa: E402
+from mock_server import API_PATH, serve  # noqa: E402
+from tenants import Tenant, TenantRegistry  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'results')
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в мегабайтах."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: list, share: float) -> float:
+    """Перцентиль по отсортированной выборке."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(share * (len(values) - 1))))
+    return values[index]
+
+
+class TimedEngine(engine.PollingEngine):
+    """Движок, замеряющий длительность каждого опроса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def notify(self, tenant, message):
+        with self._lock:
+            self.sent += 1
+        super().notify(tenant, message)
+
+    async def notify_async(self, tenant, message):
+        self.sent += 1
+        await super().notify_async(tenant, message)
+
+    def poll(self, tenant):
+        started = time.perf_counter()
+        try:
+            return super().poll(tenant)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+    async def poll_async(self, tenant, client):
+        started = time.perf_counter()
+        try:
+            return await super().poll_async(tenant, client)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def run_scenario(tenants: int, rounds: int, mode: str,
+                 base_url: str) -> dict:
+    """Прогон rounds проходов по tenants подписчикам."""
+    registry = TenantRegistry(
+        Tenant(f'token-{number}', number) for number in range(tenants)
+    )
+    bot = telegram.Bot(token='1234:bench', base_url=f'{base_url}/bot')
+    bench = TimedEngine(registry, bot)
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if mode == 'async':
+            async def one_round():
+                async with transport.AsyncClient() as client:
+                    await bench.run_once_async(client)
+            asyncio.run(one_round())
+        elif mode == 'threads':
+            with ThreadPoolExecutor(scheduler.POLL_THREADS) as executor:
+                bench.run_once_threaded(executor)
+        else:
+            bench.run_once()
+    elapsed = time.perf_counter() - started
+    polls = len(bench.durations)
+    return {
+        'tenants': tenants,
+        'rounds': rounds,
+        'mode': mode,
+        'seconds': round(elapsed, 3),
+        'polls_per_second': round(polls / elapsed, 1),
+        'notifications_per_second': round(bench.sent / elapsed, 1),
+        'p50_ms': round(percentile(bench.durations, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(bench.durations, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(bench.durations) * 1000, 2),
+        'rss_mb': round(rss_mb(), 1),
+        'rss_growth_mb': round(rss_mb() - rss_before, 1),
+    }
+
+
+def compare(results: list, baseline_path: str):
+    """Печать разницы с сохранёнными результатами."""
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {
+            (item['tenants'], item['mode']): item
+            for item in json.load(file)['results']
+        }
+    for item in results:
+        old = baseline.get((item['tenants'], item['mode']))
+        if old is None:
+            continue
+        for field in ('polls_per_second', 'p50_ms', 'p99_ms', 'rss_mb'):
+            if old[field]:
+                change = (item[field] - old[field]) / old[field] * 100
+                print(f'{item["tenants"]:>6} {item["mode"]:<6} '
+                      f'{field:<18} {old[field]:>10} -> '
+                      f'{item[field]:>10} ({change:+.1f}%)')
+
+
+def main():
+    """Разбор аргументов и запуск сценариев."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[1, 100, 10000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--mode', choices=('sync', 'async', 'threads'),
+                        default='async')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='задержка ответа API, секунд')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='доля ответов 503')
+    parser.add_argument('--homeworks', type=int, default=1,
+                        help='работ в каждом ответе')
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--output', default=None,
+                        help='файл результатов JSON')
+    parser.add_argument('--compare', default=None,
+                        help='файл прошлых результатов для сравнения')
+    args = parser.parse_args()
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve, args=(ready,), daemon=True,
+        kwargs={'latency': args.latency, 'error_rate': args.error_rate,
+                'homeworks': args.homeworks,
+                'telegram_latency': args.telegram_latency},
+    )
+    server.start()
+    base_url = f'http://127.0.0.1:{ready.get(timeout=10)}'
+    homework.ENDPOINT = base_url + API_PATH
+    transport.set_session(transport.create_session(
+        pool_size=max(transport.HTTP_POOL_SIZE, scheduler.POLL_THREADS),
+        retries=0,
+    ))
+
+    results = []
+    try:
+        for tenants in args.tenants:
+            result = run_scenario(tenants, args.rounds, args.mode, base_url)
+            print(json.dumps(result, ensure_ascii=False))
+            results.append(result)
+    finally:
+        server.terminate()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, time.strftime('pipeline-%Y%m%d-%H%M%S.json')
+    )
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'python': platform.python_version(),
+            'settings': vars(args),
+            'results': results,
+        }, file, ensure_ascii=False, indent=2)
+    print(f'Результаты сохранены в {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
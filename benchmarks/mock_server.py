@@ -0,0 +1,137 @@
+"""Локальная замена API Практикума и Bot API Telegram для бенчмарков."""
+import argparse
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+API_PATH = '/api/user_api/homework_statuses/'
+
+
+class MockState:
+    """Настройки заглушки и счётчики обращений."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, homeworks=1,
+                 telegram_latency=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.homeworks = homeworks
+        self.telegram_latency = telegram_latency
+        self.api_calls = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+
+
+def homeworks_payload(count: int, from_date: int) -> dict:
+    """Ответ API с count работами в случайных статусах."""
+    now = int(time.time())
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'user__hw{number:05d}.zip',
+                'status': random.choice(STATUSES),
+                'reviewer_comment': 'Комментарий ревьюера',
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': f'Урок {number}',
+            }
+            for number in range(count)
+        ],
+        'current_date': max(now, from_date),
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Отвечает как API Практикума и метод sendMessage Telegram."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    state = MockState()
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Запрос статусов работ."""
+        url = urlparse(self.path)
+        if url.path != API_PATH:
+            self._reply(HTTPStatus.NOT_FOUND, {})
+            return
+        state = self.state
+        with state.lock:
+            state.api_calls += 1
+        if state.latency:
+            time.sleep(state.latency)
+        if random.random() < state.error_rate:
+            self._reply(HTTPStatus.SERVICE_UNAVAILABLE, {})
+            return
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        self._reply(HTTPStatus.OK,
+                    homeworks_payload(state.homeworks, from_date))
+
+    def do_POST(self):
+        """Вызов метода Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        state = self.state
+        if state.telegram_latency:
+            time.sleep(state.telegram_latency)
+        if self.path.endswith('/sendMessage'):
+            with state.lock:
+                state.messages += 1
+            result = {'message_id': state.messages, 'date': 0,
+                      'chat': {'id': 1, 'type': 'private'}, 'text': ''}
+        elif self.path.endswith('/getMe'):
+            result = {'id': 1, 'is_bot': True, 'first_name': 'bench',
+                      'username': 'bench_bot'}
+        else:
+            result = True
+        self._reply(HTTPStatus.OK, {'ok': True, 'result': result})
+
+    def log_message(self, format, *args):
+        """Запросы не логируем."""
+
+
+def create_server(state: MockState, host='127.0.0.1', port=0):
+    """Сервер-заглушка с заданными настройками."""
+    handler = type('Handler', (MockHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    return server
+
+
+def serve(ready, **settings):
+    """Запуск заглушки в отдельном процессе; порт уходит в ready."""
+    server = create_server(MockState(**settings))
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    """Запуск заглушки из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    args = parser.parse_args()
+    state = MockState(args.latency, args.error_rate, args.homeworks,
+                      args.telegram_latency)
+    server = create_server(state, port=args.port)
+    print(f'Заглушка слушает http://127.0.0.1:{args.port}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
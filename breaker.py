@@ -0,0 +1,160 @@
+"""Автоматы защиты (circuit breaker) для API Практикума и Telegram."""
+import os
+import threading
+import time
+from http import HTTPStatus
+
+from telegram.error import BadRequest, NetworkError
+
+import metrics
+from exceptions import ErrorCircuitOpen
+
+CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 60))
+
+CLOSED = 'closed'
+HALF_OPEN = 'half-open'
+OPEN = 'open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def is_outage(error: Exception) -> bool:
+    """Сетевая ошибка Telegram, а не отказ для конкретного чата."""
+    return (isinstance(error, NetworkError)
+            and not isinstance(error, BadRequest))
+
+
+class CircuitBreaker:
+    """Автомат защиты одного внешнего сервиса, общий для всех подписчиков.
+
+    После failures сбоев подряд автомат размыкается: обращения
+    сразу получают ErrorCircuitOpen. Через reset_timeout секунд
+    пропускается одно пробное обращение: успех замыкает автомат,
+    сбой снова размыкает его. Пробное обращение без итога дольше
+    reset_timeout считается потерянным, и пропускается следующее.
+    """
+
+    def __init__(self, name: str, title: str = None,
+                 failures: int = CIRCUIT_FAILURES,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.name = name
+        self.title = title or name
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failed = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._trial_at = 0.0
+        self._announced = False
+        self._gauge = metrics.CIRCUIT_STATE.labels(name)
+
+    def _set_state(self, state: str):
+        self._state = state
+        self._gauge.set(STATE_VALUES[state])
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние с учётом истёкшего таймаута."""
+        with self._lock:
+            if (self._state == OPEN
+                    and self._clock() - self._opened_at >= self.reset_timeout):
+                self._set_state(HALF_OPEN)
+            return self._state
+
+    def remaining(self) -> float:
+        """Секунд до пробного обращения, 0 — если обращаться можно."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout
+                       - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Можно ли обращаться к сервису сейчас."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        with self._lock:
+            now = self._clock()
+            if self._trial and now - self._trial_at < self.reset_timeout:
+                return False
+            self._trial = True
+            self._trial_at = now
+            return True
+
+    def before_call(self):
+        """ErrorCircuitOpen, если обращаться к сервису нельзя."""
+        if not self.allow():
+            raise ErrorCircuitOpen(
+                f'{self.title} недоступно, повтор через '
+                f'{self.remaining():.0f} с'
+            )
+
+    def success(self):
+        """Сервис ответил, замыкаем автомат."""
+        with self._lock:
+            self._failed = 0
+            self._trial = False
+            self._announced = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def failure(self):
+        """Сбой обращения; после порога размыкаем автомат."""
+        with self._lock:
+            self._failed += 1
+            self._trial = False
+            if self._state == HALF_OPEN or self._failed >= self.failures:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def record_status(self, status_code: int):
+        """Итог обращения по коду ответа: 429 и 5xx — сбой."""
+        if (status_code == HTTPStatus.TOO_MANY_REQUESTS
+                or status_code >= HTTPStatus.INTERNAL_SERVER_ERROR):
+            self.failure()
+        else:
+            self.success()
+
+    def record_error(self, error: Exception):
+        """Итог обращения к Telegram по исключению.
+
+        Сбоем сервиса считаются только сетевые ошибки: BadRequest
+        и отказ в доступе относятся к конкретному чату.
+        """
+        if is_outage(error):
+            self.failure()
+        else:
+            self.success()
+
+    def notice(self) -> str:
+        """Общее сообщение о недоступности сервиса."""
+        return (f'{self.title} недоступно, обращения приостановлены '
+                f'на {self.reset_timeout:.0f} с')
+
+    def reset(self):
+        """Возвращаем автомат в исходное состояние."""
+        with self._lock:
+            self._failed = 0
+            self._trial = False
+            self._announced = False
+            self._set_state(CLOSED)
+
+    def announce(self) -> bool:
+        """True только первому, кто узнал о текущем размыкании."""
+        with self._lock:
+            if self._state == CLOSED or self._announced:
+                return False
+            self._announced = True
+            return True
+
+
+PRACTICUM = CircuitBreaker('practicum', 'API Практикума')
+TELEGRAM = CircuitBreaker('telegram', 'API Telegram')
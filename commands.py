@@ -0,0 +1,111 @@
+"""Команды подписчиков из Telegram: длинный опрос getUpdates."""
+import os
+import threading
+
+import telegram
+from telegram.error import TelegramError
+
+import breaker
+import homework
+import render
+
+TELEGRAM_COMMANDS = os.getenv('TELEGRAM_COMMANDS', '').lower() in (
+    '1', 'true', 'yes'
+)
+LONG_POLL_TIMEOUT = int(os.getenv('LONG_POLL_TIMEOUT', 30))
+LONG_POLL_RETRY_DELAY = float(os.getenv('LONG_POLL_RETRY_DELAY', 5))
+
+HELP = ('/status — последние известные статусы работ\n'
+        '/check — проверить статус при ближайшем опросе')
+CHECK_ACCEPTED = 'Проверю статус при ближайшем опросе.'
+NO_CHANGES = 'Новых статусов нет.'
+NO_HOMEWORKS = 'Статусы работ пока неизвестны.'
+
+logger = homework.logger.getChild('commands')
+
+
+def status_text(homeworks: list, locale: str = None) -> str:
+    """Список работ со статусами для ответа на /status."""
+    if not homeworks:
+        return NO_HOMEWORKS
+    verdicts = (render.EN_VERDICTS if locale == 'en'
+                else homework.HOMEWORK_VERDICTS)
+    return '\n'.join(f'"{name}": {verdicts.get(status, status)}'
+                     for name, status in homeworks)
+
+
+class CommandReceiver:
+    """Принимает команды подписчиков в фоновом потоке.
+
+    /status отвечает из хранилища движка без запроса к API,
+    /check только переносит ближайший опрос по расписанию.
+    Ответы уходят тем же путём, что и уведомления.
+    """
+
+    def __init__(self, bot: telegram.Bot, engine,
+                 timeout: int = LONG_POLL_TIMEOUT):
+        self.bot = bot
+        self.engine = engine
+        self.timeout = timeout
+        self.offset = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запускаем фоновый поток приёма команд."""
+        self._thread = threading.Thread(target=self._work,
+                                        name='commands', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Останавливаем приём после текущего запроса getUpdates."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _work(self):
+        while not self._stopped.is_set():
+            try:
+                self.receive()
+            except TelegramError as error:
+                breaker.TELEGRAM.record_error(error)
+                logger.warning('Ошибка получения команд: %s', error)
+                self._stopped.wait(LONG_POLL_RETRY_DELAY)
+
+    def receive(self) -> int:
+        """Один запрос getUpdates; возвращает число обновлений."""
+        updates = self.bot.get_updates(offset=self.offset,
+                                       timeout=self.timeout,
+                                       allowed_updates=['message'])
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is not None and message.text:
+                self.handle(message.chat_id, message.text)
+        return len(updates)
+
+    def handle(self, chat_id, text: str):
+        """Разбираем команду из чата подписчика.
+
+        Обычный текст без / игнорируется: бот не отвечает на переписку.
+        """
+        words = text.split()
+        if not words or not words[0].startswith('/'):
+            return
+        command = words[0].split('@')[0].lower()
+        tenants = self.engine.registry.by_chat(chat_id)
+        if not tenants:
+            logger.debug('Команда %s из неизвестного чата %s',
+                         command, chat_id)
+            return
+        logger.debug('Команда %s из чата %s', command, chat_id)
+        if command not in ('/status', '/check'):
+            self.engine.notify(tenants[0], HELP)
+            return
+        for tenant in tenants:
+            if command == '/status':
+                self.engine.notify(tenant, self.engine.status_text(tenant))
+            else:
+                self.engine.request_check(tenant)
+                self.engine.notify(tenant, CHECK_ACCEPTED)
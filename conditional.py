@@ -0,0 +1,142 @@
+"""Условные запросы к API и пропуск ответов, не изменившихся с прошлого."""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+
+import decoding
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+
+# current_date меняется в каждом ответе, в хеш тела её не включаем
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+ETAG = 'etag'
+DIGEST = 'digest'
+
+
+def body_digest(content: bytes):
+    """Хеш тела без current_date и сама current_date из тела."""
+    match = CURRENT_DATE.search(content)
+    current_date = None
+    if match is not None:
+        current_date = int(match.group(1))
+        content = content[:match.start()] + content[match.end():]
+    return hashlib.blake2b(content, digest_size=16).digest(), current_date
+
+
+class Entry:
+    """Последний принятый ответ подписчика."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'homeworks')
+
+    def __init__(self, etag, last_modified, digest, homeworks: int):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.homeworks = homeworks
+
+
+class Answer(dict):
+    """Разобранный ответ; попадает в кеш, только когда полностью обработан."""
+
+    __slots__ = ('_cache', '_key', '_entry')
+
+    def confirm(self):
+        """Ответ проверен и разобран, запоминаем его."""
+        self._cache.put(self._key, self._entry)
+
+
+class NotModified(dict):
+    """Ответ совпал с прошлым: проверять и разбирать нечего.
+
+    homeworks пуст, current_date продвигает отметку опроса.
+    reason — etag (ответ 304) или digest (совпал хеш тела),
+    skipped — сколько работ не пришлось разбирать повторно.
+    """
+
+    __slots__ = ('reason', 'skipped')
+
+    def __init__(self, current_date, reason: str, skipped: int):
+        super().__init__(homeworks=[], current_date=current_date)
+        self.reason = reason
+        self.skipped = skipped
+
+
+class ResponseCache:
+    """ETag, Last-Modified и хеш тела последнего ответа подписчика.
+
+    Ключ — заголовок Authorization. Записи вытесняются
+    в порядке давности использования.
+    """
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Запись подписчика или None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: Entry):
+        """Запоминаем принятый ответ."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Забываем все ответы."""
+        with self._lock:
+            self._entries.clear()
+
+    def request_headers(self, key, headers: dict) -> dict:
+        """Заголовки запроса с условиями If-None-Match/If-Modified-Since."""
+        entry = self.get(key)
+        if entry is None or not (entry.etag or entry.last_modified):
+            return headers
+        headers = dict(headers)
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def load(self, key, response, timestamp: int) -> dict:
+        """Ответ requests: NotModified, Answer или обычный словарь.
+
+        На 304 отметка опроса остаётся прежней. Без тела в байтах
+        (например, у подменённого ответа) кеш не используется.
+        """
+        entry = self.get(key)
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            return NotModified(timestamp, ETAG,
+                               entry.homeworks if entry else 0)
+        content = getattr(response, 'content', None)
+        if not isinstance(content, bytes):
+            return decoding.decode_response(response)
+        digest, current_date = body_digest(content)
+        if (entry is not None and current_date is not None
+                and entry.digest == digest):
+            return NotModified(current_date, DIGEST, entry.homeworks)
+        data = decoding.loads(content)
+        if not isinstance(data, dict):
+            return data
+        answer = Answer(data)
+        headers = getattr(response, 'headers', None) or {}
+        homeworks = answer.get('homeworks')
+        answer._cache = self
+        answer._key = key
+        answer._entry = Entry(
+            headers.get('ETag'), headers.get('Last-Modified'), digest,
+            len(homeworks) if isinstance(homeworks, list) else 0
+        )
+        return answer
@@ -0,0 +1,138 @@
+"""Конфигурация из файла, применяемая без перезапуска опроса."""
+import json
+import os
+import threading
+from collections import namedtuple
+
+import homework
+from exceptions import ErrorEnv
+from tenants import Tenant, parse_tenants
+
+CONFIG_FILE = os.getenv('CONFIG_FILE')
+CONFIG_POLL_INTERVAL = float(os.getenv('CONFIG_POLL_INTERVAL', 5))
+
+Config = namedtuple('Config', ('telegram_token', 'retry_period', 'endpoint',
+                               'verdicts', 'tenants'))
+
+logger = homework.logger.getChild('config')
+
+
+def parse_tenant_list(data: dict) -> list:
+    """Подписчики из tenants или из practicum_token/chat_id верхнего уровня.
+
+    Без них берутся PRACTICUM_TOKEN и CHAT_ID окружения,
+    проверка та же, что в check_tokens.
+    """
+    if 'tenants' in data:
+        return parse_tenants(data['tenants'])
+    token = data.get('practicum_token', homework.PRACTICUM_TOKEN)
+    chat_id = data.get('chat_id', homework.TELEGRAM_CHAT_ID)
+    variables = []
+    if not token:
+        variables.append('PRACTICUM_TOKEN')
+    if not chat_id:
+        variables.append('TELEGRAM_CHAT_ID')
+    if variables:
+        raise ErrorEnv('Не определена(ы) переменная(ые): '
+                       + ', '.join(variables))
+    return [Tenant(token, chat_id, locale=data.get('locale'),
+                   tenant_id=data.get('id'))]
+
+
+def parse_config(data) -> Config:
+    """Проверяем конфигурацию; отсутствующие поля берём текущими."""
+    if isinstance(data, list):
+        data = {'tenants': data}
+    if not isinstance(data, dict):
+        raise ErrorEnv('Конфигурация должна быть JSON-объектом')
+
+    telegram_token = data.get('telegram_token', homework.TELEGRAM_TOKEN)
+    if not telegram_token:
+        raise ErrorEnv('Не определена(ы) переменная(ые): TELEGRAM_TOKEN')
+
+    retry_period = data.get('retry_period', homework.RETRY_PERIOD)
+    if (not isinstance(retry_period, int) or isinstance(retry_period, bool)
+            or retry_period <= 0):
+        raise ErrorEnv('retry_period должен быть целым числом секунд больше '
+                       'нуля')
+
+    endpoint = data.get('endpoint', homework.ENDPOINT)
+    if not isinstance(endpoint, str) or not endpoint.startswith(
+            ('http://', 'https://')):
+        raise ErrorEnv(f'Некорректный адрес API: {endpoint}')
+
+    verdicts = data.get('verdicts', homework.HOMEWORK_VERDICTS)
+    if not isinstance(verdicts, dict) or not verdicts or not all(
+            isinstance(status, str) and isinstance(text, str)
+            for status, text in verdicts.items()):
+        raise ErrorEnv('verdicts должен быть непустым словарём строк')
+
+    return Config(telegram_token, retry_period, endpoint, dict(verdicts),
+                  parse_tenant_list(data))
+
+
+def load_config(path: str) -> Config:
+    """Читаем и проверяем конфигурацию из JSON-файла."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        raise ErrorEnv(f'Не удалось прочитать конфигурацию {path}: {error}')
+    return parse_config(data)
+
+
+class ConfigWatcher:
+    """Следит за файлом конфигурации по времени изменения и размеру.
+
+    Новая конфигурация проверяется целиком и передаётся в on_change
+    только без ошибок; с ошибкой остаётся прежняя, и тот же файл
+    повторно не читается.
+    """
+
+    def __init__(self, path: str, on_change,
+                 interval: float = CONFIG_POLL_INTERVAL):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._signature = self._stat()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Перечитываем файл, если он изменился; True — если применён."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            config = load_config(self.path)
+        except ErrorEnv as error:
+            logger.error('Конфигурация не применена: %s', error)
+            return False
+        logger.info('Конфигурация %s изменилась', self.path)
+        self.on_change(config)
+        return True
+
+    def start(self):
+        """Запускаем фоновую проверку файла."""
+        self._thread = threading.Thread(target=self._work, name='config',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Останавливаем проверку файла."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _work(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
@@ -0,0 +1,139 @@
+"""Разбор JSON-ответов API: быстрый декодер и потоковый режим."""
+import codecs
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from exceptions import ErrorResponseData
+
+# auto, orjson или json
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+
+WHITESPACE = ' \t\n\r'
+
+
+def get_loads(backend: str = JSON_BACKEND):
+    """Функция разбора JSON для выбранного декодера."""
+    if backend == 'json' or orjson is None:
+        return json.loads
+    return orjson.loads
+
+
+loads = get_loads()
+
+
+def decode_response(response):
+    """Тело ответа requests выбранным декодером."""
+    content = getattr(response, 'content', None)
+    if not isinstance(content, bytes):
+        return response.json()
+    return loads(content)
+
+
+class StreamingParser:
+    """Потоковый разбор ответа API.
+
+    Работы из массива homeworks отдаются по одной по мере чтения,
+    в памяти держится только текущий фрагмент тела. Остальные
+    поля верхнего уровня собираются в атрибут fields, они доступны
+    после того, как итератор исчерпан; homeworks в нём — пустой
+    список, чтобы fields проходил проверку схемы ответа.
+    """
+
+    def __init__(self, chunks, keep=None):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+        self.keep = tuple(keep) if keep else None
+        self.fields = {}
+
+    def _read(self) -> bool:
+        """Дочитываем следующий фрагмент; False, если данных больше нет."""
+        if self._exhausted:
+            return False
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._text.decode(chunk)
+                return True
+        self._buffer += self._text.decode(b'', final=True)
+        self._exhausted = True
+        return False
+
+    def _peek(self) -> str:
+        """Первый значащий символ, пропуская пробелы."""
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position] in WHITESPACE):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                raise ErrorResponseData('Ответ сервера оборван')
+
+    def _expect(self, symbols: str) -> str:
+        symbol = self._peek()
+        if symbol not in symbols:
+            raise ErrorResponseData(
+                f'Не корректный JSON в ответе сервера: "{symbol}"'
+            )
+        self._position += 1
+        return symbol
+
+    def _value(self):
+        """Очередное значение JSON целиком."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer,
+                                                      self._position)
+            except json.JSONDecodeError:
+                if self._read():
+                    continue
+                raise ErrorResponseData('Не корректный JSON в ответе сервера')
+            # число в конце фрагмента может продолжаться в следующем
+            if end == len(self._buffer) and self._read():
+                continue
+            self._position = end
+            return value
+
+    def _trim(self, homework):
+        if self.keep is None or not isinstance(homework, dict):
+            return homework
+        return {name: homework[name] for name in self.keep
+                if name in homework}
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == 'homeworks' and self._peek() == '[':
+                yield from self._homeworks()
+            else:
+                self.fields[name] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+    def _homeworks(self):
+        self._expect('[')
+        self.fields['homeworks'] = []
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self._trim(self._value())
+            if self._expect(',]') == ']':
+                return
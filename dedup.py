@@ -0,0 +1,110 @@
+"""Подавление повторных сообщений об ошибках и сводка повторов."""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+ERROR_WINDOW = float(os.getenv('ERROR_WINDOW', 3600))
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 3600))
+ERROR_FINGERPRINTS = int(os.getenv('ERROR_FINGERPRINTS', 64))
+
+# числа в тексте ошибки (from_date, коды, порты) на отпечаток не влияют
+NUMBERS = re.compile(r'\d+')
+SPACES = re.compile(r'\s+')
+
+
+def fingerprint(error: Exception) -> str:
+    """Класс исключения и текст без чисел и лишних пробелов."""
+    message = SPACES.sub(' ', NUMBERS.sub('#', str(error))).strip()
+    return f'{type(error).__name__}: {message}'
+
+
+class ErrorRecord:
+    """Отпечаток ошибки: когда о нём сообщали и сколько раз промолчали."""
+
+    __slots__ = ('name', 'sent_at', 'suppressed')
+
+    def __init__(self, name: str, sent_at: float):
+        self.name = name
+        self.sent_at = sent_at
+        self.suppressed = 0
+
+
+class ChatErrors:
+    """Отпечатки ошибок одного чата в порядке давности."""
+
+    __slots__ = ('records', 'digest_at')
+
+    def __init__(self, now: float):
+        self.records = OrderedDict()
+        self.digest_at = now
+
+
+class ErrorDeduplicator:
+    """Решает, отправлять ли сообщение об ошибке в чат.
+
+    Об ошибке с тем же отпечатком сообщаем не чаще раза в window
+    секунд, остальные повторы считаются и раз в digest_interval
+    уходят одной сводкой. На чат хранится не больше size
+    отпечатков, самые давние вытесняются.
+    """
+
+    def __init__(self, window: float = ERROR_WINDOW,
+                 digest_interval: float = ERROR_DIGEST_INTERVAL,
+                 size: int = ERROR_FINGERPRINTS, clock=time.monotonic):
+        self.window = window
+        self.digest_interval = digest_interval
+        self.size = size
+        self._clock = clock
+        self._chats = {}
+        self._lock = threading.Lock()
+
+    def should_send(self, chat_id, error: Exception) -> bool:
+        """True, если об ошибке нужно сообщить сейчас."""
+        key = fingerprint(error)
+        now = self._clock()
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat = self._chats[chat_id] = ChatErrors(now)
+            record = chat.records.get(key)
+            if record is not None and now - record.sent_at < self.window:
+                record.suppressed += 1
+                chat.records.move_to_end(key)
+                return False
+            suppressed = record.suppressed if record is not None else 0
+            record = chat.records[key] = ErrorRecord(type(error).__name__,
+                                                     now)
+            # недосказанные повторы прошлого окна попадут в сводку
+            record.suppressed = suppressed
+            chat.records.move_to_end(key)
+            while len(chat.records) > self.size:
+                chat.records.popitem(last=False)
+            return True
+
+    def clear(self):
+        """Забываем все отпечатки."""
+        with self._lock:
+            self._chats.clear()
+
+    def digest(self, chat_id):
+        """Сводка подавленных повторов, если подошёл её срок, иначе None."""
+        now = self._clock()
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat is None or now - chat.digest_at < self.digest_interval:
+                return None
+            counts = {}
+            for record in chat.records.values():
+                if record.suppressed:
+                    counts[record.name] = (counts.get(record.name, 0)
+                                           + record.suppressed)
+                    record.suppressed = 0
+            minutes = (now - chat.digest_at) / 60
+            chat.digest_at = now
+        if not counts:
+            return None
+        lines = [f'{name} ×{count}' for name, count in counts.items()]
+        return (f'Повторы ошибок за последние {minutes:.0f} мин:\n'
+                + '\n'.join(lines))
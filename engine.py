@@ -0,0 +1,579 @@
+"""Опрос API Практикума для множества подписчиков в одном процессе."""
+import asyncio
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http import HTTPStatus
+
+import telegram
+
+import breaker
+import commands
+import config
+import homework
+import logs
+import metrics
+import scheduler
+import shutdown
+import state
+import transport
+from exceptions import ErrorCircuitOpen, ErrorConnection, ErrorEnv
+from outbox import TELEGRAM_RATE_LIMIT, Outbox
+from ratelimit import TokenBucket
+from sharding import HashRing
+from tenants import Tenant, TenantRegistry, load_tenants
+
+logger = homework.logger.getChild('engine')
+
+THROTTLE_STATUSES = (HTTPStatus.TOO_MANY_REQUESTS,
+                     HTTPStatus.INTERNAL_SERVER_ERROR,
+                     HTTPStatus.BAD_GATEWAY,
+                     HTTPStatus.SERVICE_UNAVAILABLE,
+                     HTTPStatus.GATEWAY_TIMEOUT)
+
+
+class PollingEngine:
+    """Опрашивает всех подписчиков реестра одним процессом.
+
+    Ошибка одного подписчика логируется и уходит ему в чат,
+    остальные продолжают опрашиваться. Каждый подписчик стоит
+    в общей очереди планировщика со своим интервалом, общий темп
+    запросов ограничен корзиной токенов.
+    """
+
+    def __init__(self, registry: TenantRegistry, bot: telegram.Bot,
+                 retry_period: int = homework.RETRY_PERIOD,
+                 store: state.StateStore = None, outbox: Outbox = None,
+                 shard: tuple = None):
+        self.registry = registry
+        self.bot = bot
+        self.outbox = outbox
+        self.shard = shard
+        self.receiver = None
+        self.watcher = None
+        self.retry_period = retry_period
+        self.store = store or state.MemoryStateStore(
+            homework.HOMEWORK_VERDICTS
+        )
+        self.policy = scheduler.IntervalPolicy(retry_period)
+        self.scheduler = scheduler.Scheduler()
+        self.limiter = TokenBucket(shard_rate(scheduler.POLL_RATE_LIMIT,
+                                              shard))
+        self.events = queue.SimpleQueue()
+        self.inflight = set()
+        metrics.TENANTS.set_function(lambda: len(self.registry))
+        metrics.SCHEDULED.set_function(lambda: len(self.scheduler))
+        if outbox is not None:
+            metrics.OUTBOX_PENDING.set_function(lambda: len(outbox))
+
+    def restore(self):
+        """Продолжаем опрос подписчиков с сохранённых отметок."""
+        now = int(time.time())
+        for tenant in self.registry:
+            tenant.timestamp = self.store.get_checkpoint(tenant.key) or now
+
+    def start(self):
+        """Восстанавливаем отметки и ставим всех подписчиков в очередь."""
+        self.restore()
+        for tenant in self.registry:
+            tenant.interval = self.retry_period
+            self.scheduler.schedule(tenant.key)
+
+    def notify(self, tenant: Tenant, message: str):
+        """Сообщение подписчику: в очередь или сразу."""
+        if self.outbox is not None:
+            self.outbox.put(tenant.chat_id, message)
+            return
+        homework.deliver_message(self.bot, tenant.chat_id, message)
+
+    async def notify_async(self, tenant: Tenant, message: str):
+        """Сообщение подписчику без блокировки цикла событий."""
+        if self.outbox is not None:
+            self.outbox.put(tenant.chat_id, message)
+            return
+        await homework.deliver_message_async(self.bot, tenant.chat_id,
+                                             message)
+
+    def handle_answer(self, tenant: Tenant, answer: dict) -> list:
+        """Проверяем ответ сервера, возвращаем сообщения подписчику."""
+        homework.check_response(answer)
+        works = answer['homeworks']
+        if works:
+            tenant.reviewing = any(
+                work.get('status') == 'reviewing' for work in works
+            )
+        messages = homework.collect_changes(answer['homeworks'], self.store,
+                                            tenant.key, tenant.locale)
+        if not messages:
+            logger.debug('Отсутствуют новые статусы: %s', tenant.key)
+        tenant.timestamp = answer['current_date']
+        self.store.set_checkpoint(tenant.key, tenant.timestamp)
+        homework.confirm_answer(answer)
+        return messages
+
+    def alert(self, message: str):
+        """Общее сообщение о сбое в чат ALERT_CHAT_ID."""
+        logger.error(message)
+        chat_id = homework.ALERT_CHAT_ID
+        if not chat_id:
+            return
+        if self.outbox is not None:
+            self.outbox.put(chat_id, message)
+        else:
+            homework.deliver_message(self.bot, chat_id, message)
+
+    def handle_error(self, tenant: Tenant, error: Exception) -> list:
+        """Логируем сбой подписчика, сообщаем о нём не чаще раза в окно.
+
+        Пока автомат защиты разомкнут, подписчикам ничего не пишем:
+        одно общее сообщение уходит в ALERT_CHAT_ID.
+        """
+        metrics.count_error(error)
+        if isinstance(error, ErrorCircuitOpen):
+            logger.warning('%s: %s', tenant.key, error)
+            if breaker.PRACTICUM.announce():
+                self.alert(breaker.PRACTICUM.notice())
+            return []
+        message = f'Сбой в работе программы: {error}'
+        logger.error('%s: %s', tenant.key, message,
+                     exc_info=not isinstance(error, ErrorConnection))
+        if not homework.ERROR_DEDUP.should_send(tenant.chat_id, error):
+            return []
+        return [message]
+
+    def followups(self, tenant: Tenant, messages: list,
+                  error: Exception = None) -> list:
+        """Сводка повторов ошибок и ответ на /check после опроса."""
+        extra = []
+        digest = homework.ERROR_DEDUP.digest(tenant.chat_id)
+        if digest:
+            extra.append(digest)
+        if tenant.check_requested:
+            tenant.check_requested = False
+            if error is None and not messages:
+                extra.append(commands.NO_CHANGES)
+        return extra
+
+    def outcome(self, tenant: Tenant, messages: list,
+                error: Exception = None) -> str:
+        """Итог опроса для выбора следующего интервала."""
+        if isinstance(error, ErrorConnection):
+            if error.status_code in THROTTLE_STATUSES + (None,):
+                return scheduler.THROTTLED
+        if error is not None:
+            return scheduler.FAILED
+        if tenant.reviewing:
+            return scheduler.REVIEWING
+        return scheduler.CHANGED if messages else scheduler.IDLE
+
+    def reschedule(self, tenant: Tenant, outcome: str):
+        """Ставим следующий опрос подписчика."""
+        tenant.interval = self.policy.next_interval(tenant.interval, outcome)
+        self.scheduler.schedule(tenant.key, tenant.interval)
+        logger.debug('%s: итог %s, следующий опрос через %.0f с',
+                     tenant.key, outcome, tenant.interval)
+
+    def poll(self, tenant: Tenant) -> str:
+        """Один цикл опроса подписчика, исключения наружу не выходят."""
+        with logs.poll_context(tenant.key):
+            tenant.polled_at = time.monotonic()
+            error = None
+            try:
+                answer = homework.request_homeworks(tenant.timestamp,
+                                                    tenant.headers)
+                messages = self.handle_answer(tenant, answer)
+            except Exception as poll_error:
+                error = poll_error
+                messages = self.handle_error(tenant, error)
+
+            for message in messages + self.followups(tenant, messages,
+                                                     error):
+                self.notify(tenant, message)
+            return self.outcome(tenant, messages, error)
+
+    async def poll_async(self, tenant: Tenant,
+                         client: transport.AsyncClient) -> str:
+        """Асинхронный вариант poll через общий пул соединений."""
+        with logs.poll_context(tenant.key):
+            tenant.polled_at = time.monotonic()
+            error = None
+            try:
+                answer = await homework.request_homeworks_async(
+                    tenant.timestamp, tenant.headers, client
+                )
+                messages = self.handle_answer(tenant, answer)
+            except Exception as poll_error:
+                error = poll_error
+                messages = self.handle_error(tenant, error)
+
+            for message in messages + self.followups(tenant, messages,
+                                                     error):
+                await self.notify_async(tenant, message)
+            return self.outcome(tenant, messages, error)
+
+    def run_once(self):
+        """Один проход по всем подписчикам."""
+        for tenant in self.registry:
+            self.poll(tenant)
+
+    def due_tenants(self):
+        """Подписчики, срок опроса которых наступил."""
+        for key in self.scheduler.pop_due():
+            if shutdown.STOP.is_set():
+                return
+            tenant = self.registry.get(key)
+            if tenant is not None:
+                yield tenant
+
+    def run_pending(self):
+        """Опрашиваем подписчиков, срок которых наступил."""
+        for tenant in self.due_tenants():
+            self.limiter.acquire()
+            self.reschedule(tenant, self.poll(tenant))
+
+    def wait_delay(self) -> float:
+        """Сколько спать до ближайшего опроса."""
+        delay = self.scheduler.time_to_next()
+        return self.retry_period if delay is None else delay
+
+    def request_check(self, tenant: Tenant):
+        """Просьба подписчика проверить статус, из любого потока.
+
+        Отдельного запроса к API нет: ближайший опрос по расписанию
+        переносится на самый ранний допустимый срок, и после него
+        подписчик получит ответ, даже если статус не изменился.
+        """
+        tenant.check_requested = True
+        self.events.put(tenant.key)
+
+    def apply_check(self, key: str):
+        """Переносим опрос подписчика вперёд, не чаще POLL_MIN_INTERVAL."""
+        tenant = self.registry.get(key)
+        left = self.scheduler.time_until(key)
+        if tenant is None or left is None:
+            # опрос уже идёт, после него подписчик получит ответ
+            return
+        earliest = max(0.0, tenant.polled_at + self.policy.min_interval
+                       - time.monotonic())
+        if left > earliest:
+            self.scheduler.schedule(key, earliest)
+
+    def replace_bot(self, token: str):
+        """Новый бот для отправки и приёма команд после смены токена."""
+        bot = telegram.Bot(token=token)
+        self.bot = bot
+        if self.outbox is not None:
+            self.outbox.bot = bot
+        if self.receiver is not None:
+            self.receiver.bot = bot
+
+    def apply_tenants(self, tenants: list):
+        """Сверяем реестр с новым списком подписчиков.
+
+        Оставшиеся подписчики сохраняют отметку, интервал
+        и место в расписании, новые опрашиваются сразу. Подписчик
+        с явным id при смене токена остаётся прежним.
+        """
+        fresh = {tenant.key: tenant for tenant in tenants}
+        gone = {}
+        for tenant in self.registry:
+            if tenant.key not in fresh:
+                self.registry.remove(tenant.key)
+                self.scheduler.cancel(tenant.key)
+                gone.setdefault(str(tenant.chat_id), []).append(tenant)
+        self.carry_over(gone, [tenant for key, tenant in fresh.items()
+                               if key not in self.registry])
+        removed = sum(map(len, gone.values()))
+        now = int(time.time())
+        added = 0
+        for key, tenant in fresh.items():
+            current = self.registry.get(key)
+            if current is not None and current.token != tenant.token:
+                current.set_token(tenant.token)
+            if current is None:
+                tenant.timestamp = self.store.get_checkpoint(key) or now
+                tenant.interval = self.retry_period
+                self.registry.add(tenant)
+                self.scheduler.schedule(key)
+                added += 1
+            elif (current.chat_id, current.locale) != (tenant.chat_id,
+                                                       tenant.locale):
+                self.registry.remove(key)
+                current.chat_id = tenant.chat_id
+                current.locale = tenant.locale
+                self.registry.add(current)
+        return added, removed
+
+    def carry_over(self, gone: dict, arrivals: list):
+        """Переносим состояние на новый токен подписчика без id.
+
+        Перенос идёт, только если в чате сменился ровно один токен:
+        иначе не понять, какой новый подписчик заменил какого.
+        """
+        chats = {}
+        for tenant in arrivals:
+            chats.setdefault(str(tenant.chat_id), []).append(tenant)
+        for chat_id, previous in gone.items():
+            fresh = chats.get(chat_id, ())
+            if len(previous) == 1 and len(fresh) == 1:
+                self.store.copy_tenant(previous[0].key, fresh[0].key)
+                logger.info('Подписчик %s сменил токен, состояние '
+                            'перенесено на %s', previous[0].key,
+                            fresh[0].key)
+
+    def apply_config(self, new: config.Config):
+        """Применяем проверенную конфигурацию между опросами."""
+        if new.telegram_token != homework.TELEGRAM_TOKEN:
+            self.replace_bot(new.telegram_token)
+        homework.configure(new.telegram_token, new.retry_period,
+                           new.endpoint, new.verdicts)
+        self.retry_period = new.retry_period
+        self.policy.base = new.retry_period
+        added, removed = self.apply_tenants(
+            filter_shard(new.tenants, self.shard)
+        )
+        logger.info('Конфигурация применена: подписчиков %d, '
+                    'добавлено %d, удалено %d',
+                    len(self.registry), added, removed)
+
+    def status_text(self, tenant: Tenant) -> str:
+        """Последние известные статусы работ подписчика из хранилища."""
+        return commands.status_text(self.store.homeworks(tenant.key),
+                                    tenant.locale)
+
+    def wake(self):
+        """Будим ожидание событий; безопасно из обработчика сигнала."""
+        self.events.put(None)
+
+    def drain(self, deadline: shutdown.Deadline):
+        """Завершаем работу после остановки опросов.
+
+        Приём команд и слежение за конфигурацией останавливаются
+        сразу, очередь сообщений отправляется до срока deadline.
+        Отметки опроса уже сохранены после каждого опроса,
+        закрытие SQLite переносит журнал WAL в базу.
+        """
+        if self.receiver is not None:
+            self.receiver.stop(0)
+        if self.watcher is not None:
+            self.watcher.stop(0)
+        if self.outbox is not None:
+            self.outbox.stop(deadline.remaining())
+            left = len(self.outbox)
+            if left:
+                logger.warning('Не успели отправить сообщений: %d', left)
+        self.store.close()
+        logger.info('Движок остановлен')
+
+    def run_forever(self):
+        """Цикл опроса по расписанию до сигнала остановки."""
+        self.start()
+        while not shutdown.STOP.is_set():
+            self.run_pending()
+            self.process_events(self.events, self.wait_delay())
+        self.drain(shutdown.deadline())
+
+    def run_once_threaded(self, executor: ThreadPoolExecutor):
+        """Проход по всем подписчикам, запросы выполняются в пуле потоков."""
+        for _ in executor.map(self.poll, self.registry):
+            pass
+
+    def submit_pending(self, executor: ThreadPoolExecutor,
+                       slots: threading.Semaphore,
+                       completed: queue.SimpleQueue):
+        """Отдаём в пул потоков опросы, срок которых наступил.
+
+        Пока в пуле занято столько мест, сколько выдаёт slots,
+        ждём: очередь пула не растёт без ограничения.
+        """
+        for tenant in self.due_tenants():
+            self.limiter.acquire()
+            slots.acquire()
+            future = executor.submit(self.poll, tenant)
+            self.inflight.add(future)
+
+            def done(future, tenant=tenant):
+                self.inflight.discard(future)
+                slots.release()
+                completed.put((tenant, future))
+
+            future.add_done_callback(done)
+
+    def handle_event(self, item):
+        """Завершённый в пуле опрос, просьба проверить статус
+        или новая конфигурация; None только будит цикл."""
+        if item is None:
+            return
+        if isinstance(item, str):
+            self.apply_check(item)
+            return
+        if isinstance(item, config.Config):
+            self.apply_config(item)
+            return
+        tenant, future = item
+        try:
+            outcome = future.result()
+        except Exception as error:
+            logger.error('Сбой опроса подписчика %s: %s',
+                         tenant.key, error)
+            outcome = scheduler.FAILED
+        self.reschedule(tenant, outcome)
+
+    def process_events(self, events: queue.SimpleQueue, timeout: float):
+        """Разбираем события других потоков.
+
+        Ждём первое событие не дольше timeout, остальные забираем
+        без ожидания. Планировщик трогает только основной поток.
+        """
+        try:
+            item = events.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            self.handle_event(item)
+            try:
+                item = events.get_nowait()
+            except queue.Empty:
+                return
+
+    def run_forever_threaded(self, workers: int = scheduler.POLL_THREADS,
+                             queue_size: int = scheduler.POLL_QUEUE_SIZE):
+        """Цикл опроса по расписанию в пуле потоков до сигнала остановки.
+
+        Блокирующие запросы идут параллельно в workers потоках,
+        ещё queue_size опросов могут ждать в очереди пула.
+        При остановке ждущие в очереди опросы отменяются,
+        начатые дорабатывают до срока остановки.
+        """
+        self.start()
+        slots = threading.BoundedSemaphore(workers + queue_size)
+        executor = ThreadPoolExecutor(workers, thread_name_prefix='poll')
+        while not shutdown.STOP.is_set():
+            self.submit_pending(executor, slots, self.events)
+            self.process_events(self.events, self.wait_delay())
+        deadline = shutdown.deadline()
+        executor.shutdown(wait=False, cancel_futures=True)
+        _, unfinished = wait(list(self.inflight), deadline.remaining())
+        if unfinished:
+            logger.warning('Не дождались опросов: %d', len(unfinished))
+        self.drain(deadline)
+
+    async def run_once_async(self, client: transport.AsyncClient):
+        """Проход по всем подписчикам, запросы выполняются параллельно."""
+        await asyncio.gather(*(
+            self.poll_async(tenant, client) for tenant in self.registry
+        ))
+
+    async def poll_and_reschedule_async(self, tenant: Tenant,
+                                        client: transport.AsyncClient):
+        """Опрос подписчика и постановка следующего."""
+        self.reschedule(tenant, await self.poll_async(tenant, client))
+
+    async def run_pending_async(self, client: transport.AsyncClient):
+        """Параллельный опрос подписчиков, срок которых наступил."""
+        tasks = []
+        for tenant in self.due_tenants():
+            while not self.limiter.try_acquire():
+                await asyncio.sleep(self.limiter.delay())
+            tasks.append(asyncio.create_task(
+                self.poll_and_reschedule_async(tenant, client)
+            ))
+        await asyncio.gather(*tasks)
+
+    async def run_forever_async(self):
+        """Асинхронный цикл опроса по расписанию до сигнала остановки."""
+        self.start()
+        async with transport.AsyncClient() as client:
+            while not shutdown.STOP.is_set():
+                await self.run_pending_async(client)
+                # ожидание в потоке: просьба /check будит цикл раньше срока
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.process_events, self.events, self.wait_delay()
+                )
+        self.drain(shutdown.deadline())
+
+
+def shard_rate(rate: float, shard: tuple = None) -> float:
+    """Доля общего лимита, приходящаяся на один шард."""
+    if shard is None:
+        return rate
+    return rate / shard[1]
+
+
+def filter_shard(tenants: list, shard: tuple = None) -> list:
+    """Подписчики шарда shard — пары (номер, число шардов)."""
+    if shard is None:
+        return list(tenants)
+    number, count = shard
+    ring = HashRing(count)
+    return [tenant for tenant in tenants
+            if ring.shard_for(tenant.identity) == number]
+
+
+def build_registry(shard: tuple = None) -> TenantRegistry:
+    """Реестр из TENANTS_FILE или из переменных окружения одного бота.
+
+    shard — пара (номер, число шардов): в реестр попадают только
+    подписчики этого шарда.
+    """
+    if homework.TENANTS_FILE:
+        return TenantRegistry(
+            filter_shard(load_tenants(homework.TENANTS_FILE), shard)
+        )
+
+    homework.check_tokens()
+    return TenantRegistry([Tenant(homework.PRACTICUM_TOKEN,
+                                  homework.TELEGRAM_CHAT_ID)])
+
+
+def run_engine(mode: str, shard: tuple = None):
+    """Запуск многопользовательского движка.
+
+    С CONFIG_FILE настройки и подписчики берутся из него, изменения
+    файла применяются на лету; иначе на лету перечитывается
+    TENANTS_FILE.
+    """
+    config_path = config.CONFIG_FILE or homework.TENANTS_FILE
+    try:
+        if config.CONFIG_FILE:
+            initial = config.load_config(config.CONFIG_FILE)
+            homework.configure(initial.telegram_token, initial.retry_period,
+                               initial.endpoint, initial.verdicts)
+            registry = TenantRegistry(filter_shard(initial.tenants, shard))
+        elif not homework.TELEGRAM_TOKEN:
+            raise ErrorEnv('Не определена(ы) переменная(ые): TELEGRAM_TOKEN')
+        else:
+            registry = build_registry(shard)
+    except ErrorEnv as error:
+        logger.critical(error)
+        sys.exit(1)
+
+    logger.info('Запуск движка в режиме %s, подписчиков: %d',
+                mode, len(registry))
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    store = state.open_store(homework.STATE_PATH, homework.HOMEWORK_VERDICTS)
+    engine = PollingEngine(registry, bot, retry_period=homework.RETRY_PERIOD,
+                           store=store,
+                           outbox=Outbox(bot, rate=shard_rate(
+                               TELEGRAM_RATE_LIMIT, shard
+                           )).start(),
+                           shard=shard)
+    if commands.TELEGRAM_COMMANDS and shard is None:
+        engine.receiver = commands.CommandReceiver(bot, engine).start()
+    if config_path:
+        engine.watcher = config.ConfigWatcher(config_path,
+                                              engine.events.put).start()
+    shutdown.on_stop(engine.wake)
+    shutdown.install()
+    if mode == 'async':
+        asyncio.run(engine.run_forever_async())
+    elif mode == 'threads':
+        # Каждому потоку пула — своё соединение в общей сессии.
+        transport.set_session(transport.create_session(
+            max(transport.HTTP_POOL_SIZE, scheduler.POLL_THREADS)
+        ))
+        engine.run_forever_threaded()
+    else:
+        engine.run_forever()
@@ -13,6 +13,20 @@ class ErrorResponseData(TypeError):
 class ErrorConnection(Exception):
     """Проблемы с доступом к серверу."""
 
+    def __init__(self, *args, status_code=None):
+        super().__init__(*args)
+        self.status_code = status_code
+
+
+class ErrorCircuitOpen(ErrorConnection):
+    """Автомат защиты разомкнут, обращение к серверу не выполнялось."""
+
+    pass
+
+
+class ShutdownRequested(BaseException):
+    """Получен сигнал остановки; не перехватывается except Exception."""
+
     pass
 
 
@@ -1,3 +1,5 @@
+import asyncio
+import contextvars
 import logging
 import os
 import sys
@@ -9,8 +11,21 @@ import telegram
 from dotenv import load_dotenv
 from telegram.error import TelegramError
 
-from exceptions import (ErrorConnection, ErrorEnv, ErrorResponseData,
-                        ErrorStatus)
+import breaker
+import conditional
+import decoding
+import dedup
+import logs
+import metrics
+import render
+import schema
+import shutdown
+import singleflight
+import state
+import transport
+from exceptions import (ErrorCircuitOpen, ErrorConnection, ErrorEnv,
+                        ErrorResponseData, ErrorStatus)
+from tenants import make_key
 
 load_dotenv()
 
@@ -18,10 +33,20 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('CHAT_ID')
+ALERT_CHAT_ID = os.getenv('ALERT_CHAT_ID', TELEGRAM_CHAT_ID)
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+# engine подстраивает интервал опроса и для одного токена из окружения,
+# single — цикл main() с постоянным RETRY_PERIOD
+RUN_MODE = os.getenv('RUN_MODE', 'engine')
+STATE_PATH = os.getenv('STATE_PATH')
 
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STREAM_FIELDS = ('homework_name', 'status', 'date_updated')
+RESPONSE_CACHE = conditional.ResponseCache()
+ERROR_DEDUP = dedup.ErrorDeduplicator()
+FLIGHTS = singleflight.SingleFlight()
 
 
 HOMEWORK_VERDICTS = {
@@ -29,16 +54,13 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+VALIDATORS = schema.compile_validators(HOMEWORK_VERDICTS)
+RENDERER = render.Renderer(HOMEWORK_VERDICTS)
+metrics.RENDER_CACHE_HITS.set_function(lambda: RENDERER.totals()[0])
+metrics.RENDER_CACHE_MISSES.set_function(lambda: RENDERER.totals()[1])
 
 logger = logging.getLogger(__name__)
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(
-    ('%(asctime)s - %(name)s - %(levelname)s '
-     '-%(funcName)s - %(lineno)d - %(message)s')
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(logging.DEBUG)
+logs.configure_logger(logger)
 
 
 def check_tokens():
@@ -59,97 +81,370 @@ def check_tokens():
         raise ErrorEnv(message)
 
 
-def send_message(bot: telegram.Bot, message: str):
-    """Отправка сообщения."""
+def configure(telegram_token: str = None, retry_period: int = None,
+              endpoint: str = None, verdicts: dict = None):
+    """Меняем настройки модуля на лету.
+
+    Схема и шаблоны пересобираются только при смене вердиктов,
+    кеш ответов сбрасывается только при смене адреса API.
+    """
+    global TELEGRAM_TOKEN, RETRY_PERIOD, ENDPOINT
+    global HOMEWORK_VERDICTS, VALIDATORS
+    if telegram_token is not None:
+        TELEGRAM_TOKEN = telegram_token
+    if retry_period is not None:
+        RETRY_PERIOD = retry_period
+    if endpoint is not None and endpoint != ENDPOINT:
+        ENDPOINT = endpoint
+        RESPONSE_CACHE.clear()
+    if verdicts is not None and verdicts != HOMEWORK_VERDICTS:
+        VALIDATORS = schema.compile_validators(verdicts)
+        RENDERER.compile(verdicts)
+        HOMEWORK_VERDICTS = verdicts
+
+
+def deliver_message(bot: telegram.Bot, chat_id, message: str) -> bool:
+    """Отправка сообщения в указанный чат.
+
+    False — Telegram недоступен и сообщение стоит отправить позже.
+    """
+    if not breaker.TELEGRAM.allow():
+        if breaker.TELEGRAM.announce():
+            logger.error(breaker.TELEGRAM.notice())
+        logger.warning('Сообщение в чат %s отложено: %s', chat_id,
+                       message)
+        return False
     try:
-        logger.debug('Пытаемся отправить сообщение: ' + message)
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug('отправлено сообщение :' + message)
+        logger.debug('Пытаемся отправить сообщение: %s', message)
+        started = time.monotonic()
+        try:
+            bot.send_message(chat_id, message,
+                             timeout=transport.TELEGRAM_TIMEOUT)
+        except TelegramError as error:
+            breaker.TELEGRAM.record_error(error)
+            raise
+        breaker.TELEGRAM.success()
+        duration = time.monotonic() - started
+        metrics.TELEGRAM_LATENCY.observe(duration)
+        metrics.NOTIFICATIONS.inc()
+        logger.debug('отправлено сообщение: %s', message,
+                     extra={'duration': duration})
     except TelegramError as error:
         logger.error(error)
+        return not breaker.is_outage(error)
+    return True
+
+
+def send_message(bot: telegram.Bot, message: str):
+    """Отправка сообщения."""
+    return deliver_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_pending(bot: telegram.Bot, pending: list) -> list:
+    """Отправляем накопленные сообщения по порядку, возвращаем неотправленные.
+
+    Статус работы записан до отправки, поэтому сообщение, которое
+    не ушло из-за недоступности Telegram, повторяется в следующем цикле.
+    """
+    for number, text_status in enumerate(pending):
+        if send_message(bot, text_status) is False:
+            return pending[number:]
+    return []
+
+
+def describe_request(payload: dict) -> str:
+    """Адрес и параметры запроса для текста ошибки."""
+    return f'{ENDPOINT}, параметры: {payload}'
+
+
+def check_status_code(status_code: int, payload: dict,
+                      duration: float = None):
+    """Проверяем код ответа сервера."""
+    logger.debug('Результат запроса с адреса: %s, параметры: %s - %s',
+                 ENDPOINT, payload, status_code,
+                 extra={'status_code': status_code, 'duration': duration})
+    if status_code != HTTPStatus.OK:
+        raise ErrorConnection(
+            f'Неверный статус ответа при подключении к '
+            f'узлу: {describe_request(payload)}, статус: {status_code}',
+            status_code=status_code
+        )
+
+
+def request_homeworks(timestamp: int, headers: dict) -> dict:
+    """Получаем данные от сервера с заданными заголовками.
+
+    Одновременные запросы с тем же токеном и from_date разделяют
+    один запрос к API и один разобранный ответ.
+    """
+    return FLIGHTS.do((headers.get('Authorization'), timestamp),
+                      fetch_homeworks, timestamp, headers)
+
+
+def fetch_homeworks(timestamp: int, headers: dict) -> dict:
+    """Запрос к серверу и разбор ответа."""
+    payload = {'from_date': timestamp}
+    key = headers.get('Authorization')
+    breaker.PRACTICUM.before_call()
+
+    try:
+        logger.debug('Пытаемся отправить запрос на адрес: %s, '
+                     'параметры: %s', ENDPOINT, payload)
+        started = time.monotonic()
+        try:
+            response = transport.get_session().get(
+                ENDPOINT, params=payload,
+                headers=RESPONSE_CACHE.request_headers(key, headers),
+                timeout=transport.REQUEST_TIMEOUT
+            )
+        finally:
+            duration = time.monotonic() - started
+            metrics.PRACTICUM_LATENCY.observe(duration)
+    except requests.RequestException:
+        breaker.PRACTICUM.failure()
+        raise ErrorConnection(
+            f'Ошибка подключения к узлу: {describe_request(payload)}'
+        )
+    except Exception:
+        # итог нужен автомату и здесь, иначе пробный запрос не завершится
+        breaker.PRACTICUM.failure()
+        raise
+
+    return accept_response(key, response, payload, duration)
+
+
+def accept_response(key, response, payload: dict, duration: float):
+    """Проверяем код ответа и разбираем тело через кеш ответов."""
+    if response.status_code != HTTPStatus.NOT_MODIFIED:
+        try:
+            check_status_code(response.status_code, payload, duration)
+        except ErrorConnection:
+            breaker.PRACTICUM.record_status(response.status_code)
+            raise
+
+    try:
+        data = RESPONSE_CACHE.load(key, response, payload['from_date'])
+    except Exception:
+        # 200 с телом не в JSON (например, страница HTML) — тоже сбой
+        breaker.PRACTICUM.failure()
+        raise
+    breaker.PRACTICUM.success()
+    return data
+
+
+def read_chunks(response, payload: dict):
+    """Фрагменты тела ответа; обрыв соединения — ErrorConnection."""
+    try:
+        yield from response.iter_content(decoding.STREAM_CHUNK_SIZE)
+    except requests.RequestException:
+        raise ErrorConnection(
+            f'Ошибка чтения ответа узла: {describe_request(payload)}'
+        )
+    finally:
+        response.close()
+
+
+def stream_homeworks(timestamp: int,
+                     headers: dict) -> decoding.StreamingParser:
+    """Запрос с потоковым разбором ответа для больших историй работ."""
+    payload = {'from_date': timestamp}
+    breaker.PRACTICUM.before_call()
+
+    try:
+        logger.debug('Пытаемся отправить запрос на адрес: %s, '
+                     'параметры: %s', ENDPOINT, payload)
+        response = transport.get_session().get(
+            ENDPOINT, headers=headers, params=payload, stream=True,
+            timeout=transport.REQUEST_TIMEOUT
+        )
+    except requests.RequestException:
+        breaker.PRACTICUM.failure()
+        raise ErrorConnection(
+            f'Ошибка подключения к узлу: {describe_request(payload)}'
+        )
+    except Exception:
+        breaker.PRACTICUM.failure()
+        raise
+
+    breaker.PRACTICUM.record_status(response.status_code)
+    if response.status_code != HTTPStatus.OK:
+        response.close()
+    check_status_code(response.status_code, payload)
+    return decoding.StreamingParser(read_chunks(response, payload),
+                                    keep=STREAM_FIELDS)
 
 
 def get_api_answer(timestamp: int) -> dict:
     """Получаем данные от сервера."""
-    payload = {'from_date': timestamp}
+    return request_homeworks(timestamp, HEADERS)
+
+
+async def request_homeworks_async(timestamp: int, headers: dict,
+                                  client: transport.AsyncClient) -> dict:
+    """Асинхронный запрос к серверу через общий пул соединений.
 
-    url_info = f'{ENDPOINT}, параметры: {payload}'
+    Одновременные запросы с тем же токеном и from_date объединяются.
+    """
+    return await FLIGHTS.do_async((headers.get('Authorization'), timestamp),
+                                  fetch_homeworks_async, timestamp, headers,
+                                  client)
+
+
+async def fetch_homeworks_async(timestamp: int, headers: dict,
+                                client: transport.AsyncClient) -> dict:
+    """Асинхронный запрос к серверу и разбор ответа."""
+    payload = {'from_date': timestamp}
+    key = headers.get('Authorization')
+    breaker.PRACTICUM.before_call()
 
     try:
-        logger.debug(f'Пытаемся отправить запрос на адрес: {url_info}')
-        response = requests.get(ENDPOINT, headers=HEADERS, params=payload)
-        logger.debug(f'Результат запроса с адреса: {url_info}'
-                     f' - {response.status_code}')
-        if response.status_code != HTTPStatus.OK:
-            raise ErrorConnection(
-                f'Неверный статус ответа при подключении к '
-                f'узлу: {url_info}, статус: {response.status_code}'
+        logger.debug('Пытаемся отправить запрос на адрес: %s, '
+                     'параметры: %s', ENDPOINT, payload)
+        started = time.monotonic()
+        try:
+            response = await client.get(
+                ENDPOINT, RESPONSE_CACHE.request_headers(key, headers),
+                payload
             )
-    except requests.RequestException:
-        raise ErrorConnection(f'Ошибка подключения к узлу: {url_info}')
+        finally:
+            duration = time.monotonic() - started
+            metrics.PRACTICUM_LATENCY.observe(duration)
+    except transport.TRANSPORT_ERRORS:
+        breaker.PRACTICUM.failure()
+        raise ErrorConnection(
+            f'Ошибка подключения к узлу: {describe_request(payload)}'
+        )
+    except Exception:
+        # итог нужен автомату и здесь, иначе пробный запрос не завершится
+        breaker.PRACTICUM.failure()
+        raise
 
-    return response.json()
+    return accept_response(key, response, payload, duration)
 
 
-def check_response(response: dict):
-    """Проверяем соответствие ответа сервера типу данных."""
-    logger.debug('Начало проверки данных')
+async def get_api_answer_async(timestamp: int,
+                               client: transport.AsyncClient) -> dict:
+    """Асинхронно получаем данные от сервера."""
+    return await request_homeworks_async(timestamp, HEADERS, client)
 
-    parameters = []
-    if not isinstance(response, dict):
-        raise ErrorResponseData('Не коректный ответа сервера, '
-                                'результат не словарь')
 
-    home_works = response.get('homeworks')
-    if home_works is None:
-        parameters.append('homeworks')
-    elif not isinstance(home_works, list):
-        raise ErrorResponseData('Не коректный ответа сервера, '
-                                '"homeworks" не list')
+async def deliver_message_async(bot: telegram.Bot, chat_id, message: str):
+    """Отправка сообщения, не блокирующая цикл событий."""
+    loop = asyncio.get_running_loop()
+    # пул потоков не копирует contextvars сам, переносим идентификатор цикла
+    context = contextvars.copy_context()
+    await loop.run_in_executor(None, context.run, deliver_message, bot,
+                               chat_id, message)
 
-    if response.get('current_date') is None:
-        parameters.append('current_date')
 
-    if parameters:
-        message = ('Не корректный ответ сервера, '
-                   'отсутствую параметр(ы): '
-                   + ', '.join(parameters))
-        raise ErrorResponseData(message)
+async def send_message_async(bot: telegram.Bot, message: str):
+    """Асинхронная отправка сообщения."""
+    await deliver_message_async(bot, TELEGRAM_CHAT_ID, message)
 
+
+def check_response(response: dict):
+    """Проверяем соответствие ответа сервера типу данных."""
+    if isinstance(response, conditional.NotModified):
+        logger.debug('Ответ не изменился (%s), проверка пропущена',
+                     response.reason)
+        metrics.SKIPPED_RESPONSES.labels(response.reason).inc()
+        metrics.SKIPPED_HOMEWORKS.inc(response.skipped)
+        return
+    logger.debug('Начало проверки данных')
+    VALIDATORS.response(response)
     logger.debug('Данные от сервера проверены успешно')
 
 
-def parse_status(homework) -> str:
-    """Считываем статус работы."""
+def confirm_answer(response: dict):
+    """Ответ обработан: такой же следующий можно не разбирать."""
+    if isinstance(response, conditional.Answer):
+        response.confirm()
+
+
+def render_status(homework: dict, locale: str = None) -> str:
+    """Проверяем работу и собираем текст на нужном языке."""
     logger.debug('Начинаем разбор состояния домашнего задания')
+    VALIDATORS.homework(homework)
+    message = RENDERER.render(homework, locale)
+    logger.debug('Разбор состояния домашнего задания успешен')
+    return message
 
-    parameters = []
-    homework_name = homework.get('homework_name')
-    if homework_name is None:
-        parameters.append('homework_name')
 
-    status = homework.get('status')
-    if status is None:
-        parameters.append('status')
+def parse_status(homework) -> str:
+    """Считываем статус работы."""
+    return render_status(homework)
 
-    if parameters:
-        message = ('В структуре отсутствуют параметр(ы): '
-                   + ', '.join(parameters))
-        raise ErrorResponseData(message)
 
-    try:
-        verdict = HOMEWORK_VERDICTS[status]
-    except KeyError:
-        raise ErrorStatus(f'Не корректный статус работы: {status}')
+def collect_changes(homeworks: list, store: state.StateStore,
+                    tenant_key: str, locale: str = None) -> list:
+    """Сообщения о работах, статус которых изменился с прошлого опроса.
 
-    logger.debug('Разбор состояния домашнего задания успешен')
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    Работы разбираются от старых к новым, повторно пришедший
+    статус не даёт нового сообщения.
+    """
+    messages = []
+    for homework in reversed(homeworks):
+        try:
+            message = record_change(homework, store, tenant_key, locale)
+        except (ErrorResponseData, ErrorStatus) as error:
+            skip_homework(error)
+            continue
+        if message is not None:
+            messages.append(message)
+    return messages
+
+
+def skip_homework(error: Exception):
+    """Некорректная работа пропускается, остальные обрабатываются."""
+    metrics.count_error(error)
+    logger.error('Работа пропущена: %s', error)
+
+
+def record_change(homework: dict, store: state.StateStore, tenant_key: str,
+                  locale: str = None):
+    """Запоминаем новый статус работы; сообщение о нём или None.
+
+    Некорректная работа даёт ErrorResponseData или ErrorStatus
+    до записи статуса.
+    """
+    VALIDATORS.homework(homework)
+    homework_name = homework['homework_name']
+    status = homework['status']
+    if store.get_status(tenant_key, homework_name) == status:
+        return None
+    message = RENDERER.render(homework, locale)
+    store.set_status(tenant_key, homework_name, status,
+                     state.parse_date(homework.get('date_updated')))
+    return message
+
+
+def report_error(bot: telegram.Bot, error: Exception):
+    """Логируем сбой и сообщаем о нём, если он новый.
+
+    Пока автомат защиты разомкнут, вместо текста каждой ошибки
+    отправляется одно сообщение о недоступности API.
+    """
+    metrics.count_error(error)
+    if isinstance(error, ErrorCircuitOpen):
+        logger.warning(error)
+        if breaker.PRACTICUM.announce():
+            send_message(bot, breaker.PRACTICUM.notice())
+        return
+    message = f'Сбой в работе программы: {error}'
+    logger.error(message, exc_info=not isinstance(error, ErrorConnection))
+    if ERROR_DEDUP.should_send(TELEGRAM_CHAT_ID, error):
+        send_message(bot, message)
+
+
+def send_error_digest(bot: telegram.Bot):
+    """Сводка подавленных повторов ошибок, когда подошёл её срок."""
+    digest = ERROR_DEDUP.digest(TELEGRAM_CHAT_ID)
+    if digest:
+        send_message(bot, digest)
 
 
 def main():
     """Основная логика работы бота."""
-    last_error = ''
-
     try:
         check_tokens()
     except ErrorEnv as error:
@@ -157,29 +452,61 @@ def main():
         sys.exit(1)
 
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-
-    while True:
-        try:
-            answer = get_api_answer(timestamp)
-            check_response(answer)
-            works = answer.get('homeworks')
-            if works:
-                text_status = parse_status(works[0])
-                send_message(bot, text_status)
-            else:
-                logger.debug('Отсутствуют новые статусы')
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message, exc_info=True)
-            if message != last_error:
-                last_error = message
-                send_message(bot, message)
-
-        timestamp = int(time.time())
-        time.sleep(RETRY_PERIOD)
+    store = state.open_store(STATE_PATH, HOMEWORK_VERDICTS)
+    tenant_key = make_key(PRACTICUM_TOKEN)
+    timestamp = store.get_checkpoint(tenant_key) or int(time.time())
+    pending = []
+
+    # SIGTERM дожидается конца опроса и отправки, а сон прерывает сразу
+    with shutdown.graceful():
+        while True:
+            with logs.poll_context(tenant_key):
+                try:
+                    answer = get_api_answer(timestamp)
+                    check_response(answer)
+                    messages = collect_changes(answer.get('homeworks'),
+                                               store, tenant_key)
+                    pending.extend(messages)
+                    pending = send_pending(bot, pending)
+                    if not messages:
+                        logger.debug('Отсутствуют новые статусы')
+                    timestamp = answer.get('current_date')
+                    store.set_checkpoint(tenant_key, timestamp)
+                    confirm_answer(answer)
+
+                except Exception as error:
+                    report_error(bot, error)
+                    pending = send_pending(bot, pending)
+
+                send_error_digest(bot)
+
+            with shutdown.interruptible():
+                time.sleep(RETRY_PERIOD)
+
+    logger.info('Остановка по сигналу, отметка опроса: %s', timestamp)
+    store.close()
+
+
+def run():
+    """Запуск бота в режиме, заданном переменной RUN_MODE."""
+    if RUN_MODE == 'sharded':
+        from sharding import run_supervisor
+        run_supervisor()
+        return
+
+    transport.set_session(transport.create_session())
+    if metrics.METRICS_PORT:
+        metrics.start_server(int(metrics.METRICS_PORT))
+
+    if RUN_MODE == 'single':
+        main()
+        return
+
+    from engine import run_engine
+    run_engine(RUN_MODE)
 
 
 if __name__ == '__main__':
-    main()
+    # модули движка импортируют homework, не даём загрузить его повторно
+    sys.modules.setdefault('homework', sys.modules[__name__])
+    run()
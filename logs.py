@@ -0,0 +1,159 @@
+"""Настройка логирования бота из переменных окружения."""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+# stdout, stderr или путь к файлу
+LOG_OUTPUT = os.getenv('LOG_OUTPUT', 'stdout')
+LOG_QUEUE = os.getenv('LOG_QUEUE', '').lower() in ('1', 'true', 'yes')
+# text или json
+LOG_FORMAT_MODE = os.getenv('LOG_FORMAT', 'text')
+
+LOG_FORMAT = ('%(asctime)s - %(name)s - %(levelname)s '
+              '-%(funcName)s - %(lineno)d - %(message)s')
+
+# Поля записи, которые попадают в JSON, если заданы через extra.
+EXTRA_FIELDS = ('duration', 'status_code')
+
+_listeners = []
+
+cycle_id = contextvars.ContextVar('cycle_id', default=None)
+tenant = contextvars.ContextVar('tenant', default=None)
+
+
+@contextmanager
+def poll_context(tenant_key: str = None):
+    """Новый идентификатор цикла опроса для всех записей внутри."""
+    cycle_token = cycle_id.set(uuid.uuid4().hex[:12])
+    tenant_token = tenant.set(tenant_key)
+    try:
+        yield
+    finally:
+        cycle_id.reset(cycle_token)
+        tenant.reset(tenant_token)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет к записи идентификатор цикла и подписчика."""
+
+    def filter(self, record):
+        """Запись всегда пропускается."""
+        record.cycle_id = cycle_id.get()
+        record.tenant = tenant.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись одной строкой JSON, без разбора регулярками."""
+
+    def format(self, record):
+        """JSON с основными полями, контекстом и extra."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+            'cycle_id': getattr(record, 'cycle_id', None),
+            'tenant': getattr(record, 'tenant', None),
+        }
+        for field in EXTRA_FIELDS:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Передаёт запись в очередь без форматирования.
+
+    Стандартный QueueHandler форматирует сообщение в вызывающем
+    потоке; здесь и форматирование, и вывод делает поток слушателя.
+    """
+
+    def prepare(self, record):
+        """Запись уходит в очередь как есть."""
+        return record
+
+
+def parse_level(level: str) -> int:
+    """Уровень логирования по имени, DEBUG для неизвестных."""
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.DEBUG
+
+
+def create_handler(output: str) -> logging.Handler:
+    """Обработчик для stdout, stderr или файла."""
+    if output == 'stdout':
+        return logging.StreamHandler(sys.stdout)
+    if output == 'stderr':
+        return logging.StreamHandler(sys.stderr)
+    return logging.FileHandler(output, encoding='utf-8')
+
+
+def create_formatter(mode: str) -> logging.Formatter:
+    """Текстовый или JSON-форматтер."""
+    if mode == 'json':
+        return JsonFormatter()
+    return logging.Formatter(LOG_FORMAT)
+
+
+def configure_logger(logger: logging.Logger, level: str = LOG_LEVEL,
+                     output: str = LOG_OUTPUT,
+                     use_queue: bool = LOG_QUEUE,
+                     mode: str = LOG_FORMAT_MODE) -> logging.Handler:
+    """Подключаем к логгеру обработчик и задаём уровень.
+
+    С use_queue запись только кладётся в очередь, а вывод делает
+    фоновый QueueListener, поэтому медленный вывод не тормозит опрос.
+    """
+    handler = create_handler(output)
+    handler.setFormatter(create_formatter(mode))
+    # контекст берётся в потоке, который пишет запись
+    context_filter = ContextFilter()
+    if use_queue:
+        records = queue.SimpleQueue()
+        listener = QueueListener(records, handler,
+                                 respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+        handler = DeferredQueueHandler(records)
+    handler.addFilter(context_filter)
+    handler.configured = True
+    logger.addHandler(handler)
+    logger.setLevel(parse_level(level))
+    return handler
+
+
+def stop_listeners():
+    """Дописываем очереди записей и останавливаем слушателей."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_listeners)
+
+
+def reconfigure_logger(logger: logging.Logger) -> logging.Handler:
+    """Заново подключаем обработчик в дочернем процессе.
+
+    После fork поток QueueListener родителя не существует, и записи
+    в унаследованную очередь никто бы не читал. Процессы multiprocessing
+    не вызывают atexit: перед выходом нужен stop_listeners().
+    """
+    _listeners.clear()
+    for handler in list(logger.handlers):
+        if getattr(handler, 'configured', False):
+            logger.removeHandler(handler)
+    return configure_logger(logger, LOG_LEVEL, LOG_OUTPUT, LOG_QUEUE,
+                            LOG_FORMAT_MODE)
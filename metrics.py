@@ -0,0 +1,308 @@
+"""Метрики бота в текстовом формате Prometheus."""
+import bisect
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def format_labels(labelnames, labelvalues) -> str:
+    """Метки в виде {name="value",...}."""
+    if not labelnames:
+        return ''
+    pairs = ','.join(f'{name}="{value}"'
+                     for name, value in zip(labelnames, labelvalues))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Общая часть метрик: имя, описание и дочерние метрики по меткам."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues):
+        """Дочерняя метрика для значений меток."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues,
+                                                  self._new_child())
+        return child
+
+    def _new_child(self):
+        return type(self)(self.name, self.documentation)
+
+    def samples(self):
+        """Пары (суффикс, метки, значение) для вывода."""
+        if not self.labelnames:
+            yield from self._own_samples('')
+            return
+        for labelvalues, child in list(self._children.items()):
+            labels = format_labels(self.labelnames, labelvalues)
+            yield from child._own_samples(labels)
+
+    def _own_samples(self, labels):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0
+        self._function = None
+
+    def inc(self, amount: float = 1):
+        """Увеличиваем счётчик."""
+        with self._lock:
+            self.value += amount
+
+    def set_function(self, function):
+        """Значение берётся из функции, которая сама только растёт."""
+        self._function = function
+
+    def _own_samples(self, labels):
+        value = self._function() if self._function else self.value
+        yield '', labels, value
+
+
+class Gauge(Metric):
+    """Текущее значение; может вычисляться функцией при выводе."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0
+        self._function = None
+
+    def set(self, value: float):
+        """Задаём значение."""
+        self.value = value
+
+    def set_function(self, function):
+        """Значение будет браться из функции в момент вывода."""
+        self._function = function
+
+    def _own_samples(self, labels):
+        value = self._function() if self._function else self.value
+        yield '', labels, value
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation,
+                         buckets=self.buckets)
+
+    def observe(self, value: float):
+        """Учитываем одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def _own_samples(self, labels):
+        extra = labels[1:-1] + ',' if labels else ''
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield '_bucket', '{' + f'{extra}le="{bound}"' + '}', total
+        yield '_sum', labels, self.sum
+        yield '_count', labels, total
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Добавляем метрику и возвращаем её."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        """Создаём и регистрируем счётчик."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        """Создаём и регистрируем показатель."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        """Создаём и регистрируем гистограмму."""
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def collect(self) -> list:
+        """Снимок метрик: (имя, тип, описание, значения) для передачи."""
+        return [
+            (metric.name, metric.kind, metric.documentation,
+             list(metric.samples()))
+            for metric in list(self._metrics.values())
+        ]
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        return render_snapshot(self.collect())
+
+
+def render_snapshot(snapshot: list) -> str:
+    """Снимок метрик в текстовом формате Prometheus."""
+    lines = []
+    for name, kind, documentation, samples in snapshot:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            lines.append(f'{name}{suffix}{labels} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def add_label(labels: str, name: str, value) -> str:
+    """Добавляем метку к строке меток."""
+    label = f'{name}="{value}"'
+    if not labels:
+        return '{' + label + '}'
+    return '{' + label + ',' + labels[1:]
+
+
+def merge_snapshots(snapshots: dict, label: str = 'shard') -> list:
+    """Снимки нескольких процессов в один с меткой процесса."""
+    merged = {}
+    for key, snapshot in sorted(snapshots.items(),
+                                key=lambda item: str(item[0])):
+        for name, kind, documentation, samples in snapshot:
+            entry = merged.setdefault(name, (name, kind, documentation, []))
+            entry[3].extend(
+                (suffix, add_label(labels, label, key), value)
+                for suffix, labels, value in samples
+            )
+    return list(merged.values())
+
+
+REGISTRY = Registry()
+
+PRACTICUM_LATENCY = REGISTRY.histogram(
+    'homework_api_request_seconds',
+    'Время запроса к API Практикума'
+)
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    'homework_telegram_send_seconds',
+    'Время отправки сообщения в Telegram'
+)
+ERRORS = REGISTRY.counter(
+    'homework_errors_total',
+    'Ошибки по классам исключений',
+    ('exception',)
+)
+NOTIFICATIONS = REGISTRY.counter(
+    'homework_notifications_total',
+    'Отправленные сообщения'
+)
+TENANTS = REGISTRY.gauge(
+    'homework_tenants',
+    'Число подписчиков'
+)
+SCHEDULED = REGISTRY.gauge(
+    'homework_scheduled_polls',
+    'Опросы в очереди планировщика'
+)
+OUTBOX_PENDING = REGISTRY.gauge(
+    'homework_outbox_pending',
+    'Сообщения в очереди отправки'
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    'homework_circuit_state',
+    'Автомат защиты: 0 — замкнут, 1 — пробный запрос, 2 — разомкнут',
+    ('upstream',)
+)
+COALESCED_REQUESTS = REGISTRY.counter(
+    'homework_requests_coalesced_total',
+    'Запросы к API, объединённые с уже выполняющимся',
+    ('path',)
+)
+SKIPPED_RESPONSES = REGISTRY.counter(
+    'homework_responses_skipped_total',
+    'Ответы без изменений, не проверявшиеся повторно',
+    ('reason',)
+)
+SKIPPED_HOMEWORKS = REGISTRY.counter(
+    'homework_parse_skipped_total',
+    'Работы, не разбиравшиеся повторно'
+)
+RENDER_CACHE_HITS = REGISTRY.counter(
+    'homework_render_cache_hits_total',
+    'Попадания в кеш текстов уведомлений'
+)
+RENDER_CACHE_MISSES = REGISTRY.counter(
+    'homework_render_cache_misses_total',
+    'Промахи кеша текстов уведомлений'
+)
+
+
+def count_error(error: Exception):
+    """Учитываем исключение по имени его класса."""
+    ERRORS.labels(type(error).__name__).inc()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по GET /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """Ответ на запрос метрик."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы метрик в лог не пишем."""
+
+
+def start_server(port: int, host: str = METRICS_HOST, registry=REGISTRY):
+    """HTTP-сервер метрик в фоновом потоке.
+
+    registry — любой объект с методом render().
+    """
+    handler = type('Handler', (MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics',
+                              daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,236 @@
+"""Очередь исходящих сообщений Telegram с ограничением частоты."""
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import telegram
+from telegram.error import RetryAfter, TelegramError, TimedOut
+
+import breaker
+import homework
+import logs
+import metrics
+import transport
+from ratelimit import TokenBucket
+
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', 30))
+TELEGRAM_CHAT_RATE_LIMIT = float(os.getenv('TELEGRAM_CHAT_RATE_LIMIT', 1))
+TELEGRAM_RETRIES = int(os.getenv('TELEGRAM_RETRIES', 3))
+MESSAGE_LIMIT = 4096
+
+logger = homework.logger.getChild('outbox')
+
+
+def split(text: str, limit: int = MESSAGE_LIMIT) -> list:
+    """Делим слишком длинный текст по строкам, длинную строку — по limit."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    parts.append(text)
+    return parts
+
+
+def coalesce(texts: list, limit: int = MESSAGE_LIMIT) -> list:
+    """Склеиваем сообщения одного чата, не превышая лимит длины."""
+    messages = []
+    for text in texts:
+        for part in split(text, limit):
+            if messages and len(messages[-1]) + len(part) + 2 <= limit:
+                messages[-1] = messages[-1] + '\n\n' + part
+            else:
+                messages.append(part)
+    return messages
+
+
+class Outbox:
+    """Исходящие сообщения, которые отправляет фоновый поток.
+
+    Общий темп ограничен TELEGRAM_RATE_LIMIT сообщений в секунду,
+    в один чат — TELEGRAM_CHAT_RATE_LIMIT. Пока чат ждёт своей
+    очереди, новые сообщения для него копятся и уходят одним.
+    Чаты стоят в куче по времени, когда им можно писать: RetryAfter
+    и TimedOut откладывают только свой чат, остальные отправляются.
+    """
+
+    def __init__(self, bot: telegram.Bot,
+                 rate: float = TELEGRAM_RATE_LIMIT,
+                 chat_rate: float = TELEGRAM_CHAT_RATE_LIMIT,
+                 retries: int = TELEGRAM_RETRIES, backoff: float = 1):
+        self.bot = bot
+        self.chat_interval = 1 / chat_rate
+        self.retries = retries
+        self.backoff = backoff
+        self._limiter = TokenBucket(rate)
+        self._pending = {}
+        self._ready_at = {}
+        self._attempts = {}
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def _schedule(self, chat_id, ready_at: float):
+        """Ставим чат в кучу; прежняя запись чата становится устаревшей."""
+        number = next(self._counter)
+        self._due[chat_id] = (ready_at, number)
+        heapq.heappush(self._heap, (ready_at, number, chat_id))
+
+    def put(self, chat_id, text: str):
+        """Ставим сообщение в очередь, не дожидаясь отправки.
+
+        Вместе с текстом запоминается контекст логов: отправка
+        пишется в лог с cycle_id опроса, который её породил.
+        """
+        with self._condition:
+            items = self._pending.setdefault(chat_id, [])
+            items.append((text, contextvars.copy_context()))
+            if len(items) == 1:
+                self._schedule(chat_id, self._ready_at.get(chat_id, 0))
+            self._condition.notify()
+
+    def __len__(self):
+        with self._condition:
+            return sum(len(items) for items in self._pending.values())
+
+    def start(self):
+        """Запускаем фоновый поток отправки."""
+        self._running = True
+        self._thread = threading.Thread(target=self._work, name='outbox',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Останавливаем поток, дождавшись отправки очереди."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _take(self):
+        """Забираем сообщения очередного чата или None при остановке."""
+        with self._condition:
+            while True:
+                while self._heap and self._due.get(
+                        self._heap[0][2]) != self._heap[0][:2]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    if not self._running:
+                        return None
+                    self._condition.wait()
+                    continue
+                ready_at, _, chat_id = self._heap[0]
+                wait = ready_at - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                del self._due[chat_id]
+                self._ready_at[chat_id] = (time.monotonic()
+                                           + self.chat_interval)
+                return chat_id, self._pending.pop(chat_id)
+
+    def _defer(self, chat_id, texts: list, delay: float):
+        """Возвращаем неотправленное в начало очереди чата через delay."""
+        context = contextvars.copy_context()
+        with self._condition:
+            items = [(text, context) for text in texts]
+            self._pending[chat_id] = items + self._pending.get(chat_id, [])
+            self._ready_at[chat_id] = time.monotonic() + delay
+            self._schedule(chat_id, self._ready_at[chat_id])
+            self._condition.notify()
+
+    def _prune(self):
+        now = time.monotonic()
+        with self._condition:
+            for chat_id in [chat_id for chat_id, ready_at
+                            in self._ready_at.items() if ready_at <= now]:
+                del self._ready_at[chat_id]
+
+    def _work(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            chat_id, items = item
+            # склеенные сообщения уходят в контексте первого из них
+            items[0][1].run(self.deliver, chat_id, items)
+            if len(self._ready_at) > len(self._pending) * 2 + 1000:
+                self._prune()
+
+    def deliver(self, chat_id, items: list):
+        """Отправляем накопленные сообщения чата.
+
+        Если Telegram просит подождать, остаток откладывается,
+        и поток переходит к другим чатам.
+        """
+        if len(items) > 1:
+            logger.debug('Чат %s: склеиваем сообщения циклов %s', chat_id,
+                         ', '.join(str(context.get(logs.cycle_id))
+                                   for _, context in items))
+        texts = coalesce([text for text, _ in items])
+        for index, text in enumerate(texts):
+            self._limiter.acquire()
+            delay = self.send(chat_id, text, self._attempts.get(chat_id, 0))
+            if delay is None:
+                self._attempts.pop(chat_id, None)
+                continue
+            attempts = self._attempts.get(chat_id, 0) + 1
+            if attempts > self.retries:
+                logger.error('Чат %s: сообщение не отправлено после %d '
+                             'попыток', chat_id, attempts)
+                self._attempts.pop(chat_id, None)
+                continue
+            self._attempts[chat_id] = attempts
+            logger.warning('Чат %s: повтор отправки через %s с',
+                           chat_id, delay)
+            self._defer(chat_id, texts[index:], delay)
+            return
+
+    def wait_circuit(self):
+        """Ждём, пока автомат защиты Telegram пропустит отправку."""
+        while not breaker.TELEGRAM.allow():
+            if breaker.TELEGRAM.announce():
+                logger.error(breaker.TELEGRAM.notice())
+            time.sleep(max(breaker.TELEGRAM.remaining(), 1))
+
+    def send(self, chat_id, text: str, attempt: int = 0):
+        """Одна попытка отправки; пауза до повтора или None.
+
+        None — сообщение отправлено или повтор бесполезен.
+        Пока автомат защиты Telegram разомкнут, сообщение ждёт,
+        попытки не тратятся: автомат общий для всех чатов.
+        """
+        self.wait_circuit()
+        try:
+            logger.debug('Пытаемся отправить сообщение в чат %s', chat_id)
+            started = time.monotonic()
+            try:
+                self.bot.send_message(
+                    chat_id, text, timeout=transport.TELEGRAM_TIMEOUT
+                )
+            except TelegramError as error:
+                breaker.TELEGRAM.record_error(error)
+                raise
+            breaker.TELEGRAM.success()
+            metrics.TELEGRAM_LATENCY.observe(time.monotonic() - started)
+            metrics.NOTIFICATIONS.inc()
+            logger.debug('отправлено сообщение в чат %s', chat_id)
+            return None
+        except RetryAfter as error:
+            return error.retry_after
+        except TimedOut:
+            return self.backoff * 2 ** attempt
+        except TelegramError as error:
+            logger.error('Чат %s: %s', chat_id, error)
+            return None
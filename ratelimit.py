@@ -0,0 +1,42 @@
+"""Ограничение частоты запросов алгоритмом token bucket."""
+import threading
+import time
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate: float, capacity: float = None,
+                 clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Забираем токены, если они есть."""
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def delay(self, tokens: float = 1) -> float:
+        """Сколько секунд ждать, пока накопится нужное число токенов."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens: float = 1):
+        """Ждём и забираем токены."""
+        while not self.try_acquire(tokens):
+            time.sleep(self.delay(tokens))
@@ -0,0 +1,133 @@
+"""Тексты уведомлений: шаблоны, собранные заранее, и LRU-кеш."""
+import os
+from functools import lru_cache
+from string import Formatter
+
+from exceptions import ErrorEnv
+
+NOTIFY_LOCALE = os.getenv('NOTIFY_LOCALE', 'ru')
+NOTIFY_DETAILS = os.getenv('NOTIFY_DETAILS', '').lower() in (
+    '1', 'true', 'yes'
+)
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 4096))
+
+TEMPLATES = {
+    'ru': {
+        'status': 'Изменился статус проверки работы "{homework_name}". '
+                  '{verdict}',
+        'lesson_name': 'Урок: {value}',
+        'reviewer_comment': 'Комментарий ревьюера: {value}',
+    },
+    'en': {
+        'status': 'Review status of "{homework_name}" changed. {verdict}',
+        'lesson_name': 'Lesson: {value}',
+        'reviewer_comment': 'Reviewer comment: {value}',
+    },
+}
+
+EN_VERDICTS = {
+    'approved': 'The reviewer approved the work. Hooray!',
+    'reviewing': 'The reviewer has started checking the work.',
+    'rejected': 'The reviewer has left remarks.',
+}
+
+DETAIL_FIELDS = ('lesson_name', 'reviewer_comment')
+
+
+def split_template(template: str, field: str, **values) -> tuple:
+    """Шаблон с подставленными values как (до поля, после поля)."""
+    before, after, seen = [], [], False
+    for literal, name, spec, conversion in Formatter().parse(template):
+        target = after if seen else before
+        target.append(literal)
+        if name is None:
+            continue
+        if name == field:
+            seen = True
+        else:
+            target.append(format(values[name], spec))
+    return ''.join(before), ''.join(after)
+
+
+class Renderer:
+    """Сборка текстов уведомлений.
+
+    Шаблон каждой пары (язык, статус) разбирается один раз, вердикт
+    подставляется сразу, и текст собирается склейкой трёх строк.
+    Готовые заголовки кешируются по (работа, статус, язык).
+    """
+
+    def __init__(self, verdicts: dict, default_locale: str = NOTIFY_LOCALE,
+                 details: bool = NOTIFY_DETAILS,
+                 cache_size: int = RENDER_CACHE_SIZE):
+        if default_locale not in TEMPLATES:
+            raise ErrorEnv(f'Неизвестный язык уведомлений: {default_locale}, '
+                           f'доступны: {", ".join(TEMPLATES)}')
+        self.default_locale = default_locale
+        self.details = details
+        self._cleared = (0, 0)
+        self.compile(verdicts)
+        self.render_header = lru_cache(maxsize=cache_size)(
+            self._render_header
+        )
+
+    def compile(self, verdicts: dict):
+        """Собираем шаблоны для всех языков и статусов.
+
+        Статус без перевода получает вердикт из verdicts.
+        """
+        by_locale = {
+            'ru': verdicts,
+            'en': {status: EN_VERDICTS.get(status, verdict)
+                   for status, verdict in verdicts.items()},
+        }
+        self._headers = {
+            (locale, status): split_template(
+                templates['status'], 'homework_name', verdict=verdict
+            )
+            for locale, templates in TEMPLATES.items()
+            for status, verdict in by_locale[locale].items()
+        }
+        self._details = {
+            (locale, field): split_template(templates[field], 'value')
+            for locale, templates in TEMPLATES.items()
+            for field in DETAIL_FIELDS
+        }
+        cache = getattr(self, 'render_header', None)
+        if cache is not None:
+            self._cleared = self.totals()
+            cache.cache_clear()
+
+    def _render_header(self, homework_name: str, status: str,
+                       locale: str) -> str:
+        key = (locale, status)
+        if key not in self._headers:
+            key = (self.default_locale, status)
+        before, after = self._headers[key]
+        return before + homework_name + after
+
+    def render(self, homework: dict, locale: str = None) -> str:
+        """Текст уведомления о статусе проверенной работы."""
+        locale = locale or self.default_locale
+        if locale not in TEMPLATES:
+            locale = self.default_locale
+        text = self.render_header(homework['homework_name'],
+                                  homework['status'], locale)
+        if not self.details:
+            return text
+        lines = [text]
+        for field in DETAIL_FIELDS:
+            value = homework.get(field)
+            if value:
+                before, after = self._details[(locale, field)]
+                lines.append(before + str(value) + after)
+        return '\n'.join(lines)
+
+    def cache_info(self):
+        """Попадания и промахи кеша заголовков."""
+        return self.render_header.cache_info()
+
+    def totals(self) -> tuple:
+        """Попадания и промахи за всё время, включая очищенные кеши."""
+        info = self.cache_info()
+        return self._cleared[0] + info.hits, self._cleared[1] + info.misses
@@ -0,0 +1,112 @@
+"""Планировщик опросов с адаптивным интервалом для каждого подписчика."""
+import heapq
+import itertools
+import os
+import time
+
+POLL_MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', 60))
+POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', 3600))
+POLL_IDLE_FACTOR = float(os.getenv('POLL_IDLE_FACTOR', 1.5))
+POLL_RATE_LIMIT = float(os.getenv('POLL_RATE_LIMIT', 10))
+POLL_THREADS = int(os.getenv('POLL_THREADS', 16))
+POLL_QUEUE_SIZE = int(os.getenv('POLL_QUEUE_SIZE', 64))
+
+# Итоги опроса, по которым выбирается следующий интервал.
+REVIEWING = 'reviewing'
+CHANGED = 'changed'
+IDLE = 'idle'
+THROTTLED = 'throttled'
+FAILED = 'failed'
+
+
+class IntervalPolicy:
+    """Следующий интервал опроса по итогу предыдущего.
+
+    Пока работа на проверке, опрашиваем часто: вердикт скоро.
+    Без изменений интервал растёт до max_interval, при 429/5xx
+    удваивается, после изменения возвращается к базовому.
+    """
+
+    def __init__(self, base: int, min_interval: int = POLL_MIN_INTERVAL,
+                 max_interval: int = POLL_MAX_INTERVAL,
+                 idle_factor: float = POLL_IDLE_FACTOR):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_factor = idle_factor
+
+    def next_interval(self, current: float, outcome: str) -> float:
+        """Интервал до следующего опроса, секунд."""
+        if outcome == THROTTLED:
+            return min(max(current, self.base) * 2, self.max_interval)
+        if outcome == REVIEWING:
+            return self.min_interval
+        if outcome == IDLE:
+            return min(max(current, self.min_interval) * self.idle_factor,
+                       self.max_interval)
+        return self.base
+
+
+class Scheduler:
+    """Очередь опросов на двоичной куче.
+
+    Постановка и выборка стоят O(log n) при любом числе подписчиков.
+    Перепланирование не ищет старую запись в куче: она помечается
+    устаревшей и отбрасывается при выборке.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+
+    def schedule(self, key, delay: float = 0):
+        """Ставим опрос ключа через delay секунд, заменяя прежний."""
+        number = next(self._counter)
+        due = self._clock() + delay
+        self._due[key] = (due, number)
+        heapq.heappush(self._heap, (due, number, key))
+
+    def cancel(self, key):
+        """Снимаем ключ с расписания."""
+        self._due.pop(key, None)
+
+    def _drop_stale(self):
+        while self._heap:
+            due, number, key = self._heap[0]
+            if self._due.get(key) == (due, number):
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self) -> list:
+        """Ключи, срок опроса которых наступил."""
+        now = self._clock()
+        keys = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            keys.append(key)
+            self._drop_stale()
+        return keys
+
+    def time_to_next(self):
+        """Секунд до ближайшего опроса или None, если очередь пуста."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self._clock())
+
+    def time_until(self, key):
+        """Секунд до опроса ключа или None, если его нет в расписании."""
+        entry = self._due.get(key)
+        if entry is None:
+            return None
+        return max(0.0, entry[0] - self._clock())
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
@@ -0,0 +1,88 @@
+"""Декларативная схема ответа API и валидаторы, собранные из неё."""
+from collections import namedtuple
+
+from exceptions import ErrorResponseData, ErrorStatus
+
+Field = namedtuple('Field', ('type', 'required', 'choices', 'items'),
+                   defaults=(None, True, None, None))
+
+# response проверяет только верхний уровень: работы проверяются по одной,
+# чтобы одна некорректная работа не останавливала остальные
+Validators = namedtuple('Validators', ('response', 'homework'))
+
+HOMEWORK_SCHEMA = {
+    'homework_name': Field(str),
+    # допустимые статусы подставляются при сборке валидаторов
+    'status': Field(str),
+    'id': Field(int, required=False),
+    'reviewer_comment': Field(str, required=False),
+    'date_updated': Field(str, required=False),
+    'lesson_name': Field(str, required=False),
+}
+
+RESPONSE_SCHEMA = {
+    'homeworks': Field(list, items=HOMEWORK_SCHEMA),
+    # как и раньше, от current_date требуется только наличие
+    'current_date': Field(None),
+}
+
+
+def compile_object(schema: dict, not_dict_message: str,
+                   missing_message: str, type_message: str):
+    """Собираем проверку словаря по схеме.
+
+    Правила раскладываются в кортеж один раз, проверка одного объекта
+    — один проход по нему без временных структур, пока нет ошибок.
+    Отсутствующие обязательные поля собираются в одно сообщение,
+    неверный тип сразу даёт ErrorResponseData, недопустимое значение
+    — ErrorStatus.
+    """
+    rules = tuple(
+        (name, field.type, field.required,
+         frozenset(field.choices) if field.choices else None)
+        for name, field in schema.items()
+    )
+
+    def validate(data):
+        if not isinstance(data, dict):
+            raise ErrorResponseData(not_dict_message)
+        missing = None
+        for name, kind, required, choices in rules:
+            value = data.get(name)
+            if value is None:
+                if required:
+                    missing = (missing or []) + [name]
+                continue
+            if kind is not None and not isinstance(value, kind):
+                raise ErrorResponseData(
+                    type_message.format(name=name, type=kind.__name__)
+                )
+            if choices is not None and value not in choices:
+                raise ErrorStatus(f'Не корректный статус работы: {value}')
+        if missing:
+            raise ErrorResponseData(missing_message + ', '.join(missing))
+
+    return validate
+
+
+def compile_validators(statuses) -> Validators:
+    """Валидаторы ответа и отдельной работы для набора статусов."""
+    homework_schema = dict(HOMEWORK_SCHEMA)
+    homework_schema['status'] = Field(str, choices=tuple(statuses))
+    validate_homework = compile_object(
+        homework_schema,
+        not_dict_message='Не корректная структура работы, '
+                         'результат не словарь',
+        missing_message='В структуре отсутствуют параметр(ы): ',
+        type_message='В структуре параметр "{name}" не {type}',
+    )
+    validate_object = compile_object(
+        RESPONSE_SCHEMA,
+        not_dict_message='Не коректный ответа сервера, '
+                         'результат не словарь',
+        missing_message='Не корректный ответ сервера, '
+                        'отсутствую параметр(ы): ',
+        type_message='Не коректный ответа сервера, "{name}" не {type}',
+    )
+
+    return Validators(validate_object, validate_homework)
@@ -0,0 +1,207 @@
+"""Шардирование подписчиков по процессам и супервизор шардов."""
+import bisect
+import hashlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import commands
+import homework
+import logs
+import metrics
+import shutdown
+import transport
+from exceptions import ErrorEnv
+
+SHARDS = int(os.getenv('SHARDS', os.cpu_count() or 1))
+SHARD_MODE = os.getenv('SHARD_MODE', 'engine')
+SHARD_REPLICAS = 160
+SHARD_METRICS_INTERVAL = float(os.getenv('SHARD_METRICS_INTERVAL', 15))
+SHARD_RESTART_DELAY = float(os.getenv('SHARD_RESTART_DELAY', 5))
+SHARD_RESTART_MAX_DELAY = float(os.getenv('SHARD_RESTART_MAX_DELAY', 300))
+
+logger = homework.logger.getChild('sharding')
+
+SHARD_RESTARTS = metrics.REGISTRY.counter(
+    'homework_shard_restarts_total',
+    'Перезапуски упавших шардов',
+    ('shard',)
+)
+
+
+def hash_point(value: str) -> int:
+    """Точка на кольце: одинакова во всех процессах и запусках."""
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Консистентное хеширование токенов по шардам.
+
+    У каждого шарда SHARD_REPLICAS виртуальных точек, поэтому при
+    добавлении шарда переезжает примерно 1/N подписчиков.
+    """
+
+    def __init__(self, shards: int, replicas: int = SHARD_REPLICAS):
+        self.shards = shards
+        ring = sorted(
+            (hash_point(f'shard-{shard}-{replica}'), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def shard_for(self, token: str) -> int:
+        """Номер шарда для токена."""
+        index = bisect.bisect(self._points, hash_point(token))
+        return self._owners[index % len(self._owners)]
+
+
+def publish_metrics(shard: int, snapshots, interval: float):
+    """Периодически отправляем снимок метрик шарда супервизору."""
+    while True:
+        time.sleep(interval)
+        try:
+            snapshots.put_nowait((shard, metrics.REGISTRY.collect()))
+        except queue.Full:
+            pass
+
+
+def run_shard(shard: int, shards: int, snapshots):
+    """Точка входа процесса шарда."""
+    from engine import run_engine
+
+    logs.reconfigure_logger(homework.logger)
+    transport.set_session(transport.create_session())
+    threading.Thread(
+        target=publish_metrics, name='shard-metrics', daemon=True,
+        args=(shard, snapshots, SHARD_METRICS_INTERVAL)
+    ).start()
+    try:
+        run_engine(SHARD_MODE, shard=(shard, shards))
+    finally:
+        logs.stop_listeners()
+
+
+class Supervisor:
+    """Запускает шарды, перезапускает упавшие и собирает их метрики."""
+
+    def __init__(self, shards: int = SHARDS, clock=time.monotonic):
+        self.shards = shards
+        self.snapshots = multiprocessing.Queue(maxsize=shards * 4)
+        self.latest = {}
+        self.processes = {}
+        self.started = {}
+        self.crashes = {}
+        self.restart_at = {}
+        self._clock = clock
+
+    def start_shard(self, shard: int):
+        """Запуск процесса шарда."""
+        process = multiprocessing.Process(
+            target=run_shard, name=f'shard-{shard}',
+            args=(shard, self.shards, self.snapshots)
+        )
+        process.start()
+        self.processes[shard] = process
+        self.started[shard] = self._clock()
+        logger.info('Шард %d запущен, pid %s', shard, process.pid)
+
+    def restart_delay(self, shard: int) -> float:
+        """Пауза перед перезапуском: первый сразу, дальше вдвое дольше.
+
+        Шард, проработавший SHARD_RESTART_MAX_DELAY секунд, считается
+        здоровым, и отсчёт начинается заново.
+        """
+        now = self._clock()
+        if now - self.started.get(shard, now) >= SHARD_RESTART_MAX_DELAY:
+            self.crashes[shard] = 0
+        crashes = self.crashes[shard] = self.crashes.get(shard, 0) + 1
+        if crashes == 1:
+            return 0.0
+        return min(SHARD_RESTART_DELAY * 2 ** (crashes - 1),
+                   SHARD_RESTART_MAX_DELAY)
+
+    def check_shards(self):
+        """Перезапускаем завершившиеся шарды с нарастающей паузой.
+
+        Шард с ошибкой конфигурации падает сразу после запуска:
+        пауза не даёт перезапускать его каждые SHARD_RESTART_DELAY.
+        """
+        now = self._clock()
+        for shard, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            if shard not in self.restart_at:
+                delay = self.restart_delay(shard)
+                self.restart_at[shard] = now + delay
+                logger.error('Шард %d завершился с кодом %s, перезапуск '
+                             'через %.0f с', shard, process.exitcode, delay)
+            if now < self.restart_at[shard]:
+                continue
+            del self.restart_at[shard]
+            SHARD_RESTARTS.labels(shard).inc()
+            self.start_shard(shard)
+
+    def drain_snapshots(self):
+        """Забираем присланные шардами снимки метрик."""
+        while True:
+            try:
+                shard, snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return
+            self.latest[shard] = snapshot
+
+    def render(self) -> str:
+        """Метрики супервизора и всех шардов."""
+        self.drain_snapshots()
+        merged = metrics.merge_snapshots(
+            {'supervisor': metrics.REGISTRY.collect(), **self.latest}
+        )
+        return metrics.render_snapshot(merged)
+
+    def stop_shards(self, deadline: shutdown.Deadline):
+        """Передаём шардам SIGTERM и ждём их до срока, потом SIGKILL."""
+        for process in self.processes.values():
+            process.terminate()
+        for shard, process in self.processes.items():
+            process.join(deadline.remaining())
+            if process.is_alive():
+                logger.warning('Шард %d не остановился к сроку', shard)
+                process.kill()
+        logger.info('Шарды остановлены')
+
+    def run_forever(self):
+        """Запуск шардов и наблюдение за ними до сигнала остановки."""
+        for shard in range(self.shards):
+            self.start_shard(shard)
+        while not shutdown.STOP.wait(SHARD_RESTART_DELAY):
+            self.drain_snapshots()
+            self.check_shards()
+        self.stop_shards(shutdown.deadline())
+
+
+def run_supervisor():
+    """Запуск бота в режиме шардов."""
+    if not homework.TENANTS_FILE or not homework.TELEGRAM_TOKEN:
+        logger.critical(ErrorEnv(
+            'Для режима шардов нужны TENANTS_FILE и TELEGRAM_TOKEN'
+        ))
+        sys.exit(1)
+    if commands.TELEGRAM_COMMANDS:
+        # getUpdates отдаёт обновления одному опрашивающему, а чат
+        # подписчика другого шарда отбросился бы как неизвестный
+        logger.critical(ErrorEnv(
+            'TELEGRAM_COMMANDS не поддерживается в режиме шардов'
+        ))
+        sys.exit(1)
+
+    supervisor = Supervisor()
+    shutdown.install()
+    if metrics.METRICS_PORT:
+        metrics.start_server(int(metrics.METRICS_PORT),
+                             registry=supervisor)
+    supervisor.run_forever()
@@ -0,0 +1,108 @@
+"""Плавная остановка по SIGTERM/SIGINT."""
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from exceptions import ShutdownRequested
+
+# Heroku ждёт 30 секунд между SIGTERM и SIGKILL
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+STOP = threading.Event()
+
+_callbacks = []
+_waiting = False
+_requested_at = None
+
+
+def on_stop(callback):
+    """Вызвать callback из обработчика сигнала, например чтобы разбудить цикл.
+
+    Вызывается внутри обработчика: только быстрые неблокирующие
+    действия вроде SimpleQueue.put.
+    """
+    _callbacks.append(callback)
+
+
+def request_stop(signum=None, frame=None):
+    """Обработчик сигнала: новые опросы не начинаются."""
+    global _requested_at
+    if _requested_at is None:
+        _requested_at = time.monotonic()
+    STOP.set()
+    for callback in _callbacks:
+        callback()
+    if _waiting:
+        raise ShutdownRequested(signum)
+
+
+def reset():
+    """Сбрасываем остановку и обработчики, для тестов."""
+    global _requested_at
+    STOP.clear()
+    _callbacks.clear()
+    _requested_at = None
+
+
+def install() -> dict:
+    """Ставим обработчики сигналов; возвращаем прежние."""
+    return {signum: signal.signal(signum, request_stop)
+            for signum in SIGNALS}
+
+
+def restore(previous: dict):
+    """Возвращаем прежние обработчики сигналов."""
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+
+
+@contextmanager
+def graceful():
+    """Цикл внутри блока завершается по сигналу, а не обрывается.
+
+    ShutdownRequested из interruptible() гасится на выходе из блока.
+    """
+    previous = install()
+    try:
+        yield
+    except ShutdownRequested:
+        pass
+    finally:
+        restore(previous)
+
+
+@contextmanager
+def interruptible():
+    """Ожидание внутри блока прерывается сигналом остановки.
+
+    Если остановку уже запросили, блок не выполняется вовсе.
+    """
+    global _waiting
+    _waiting = True
+    try:
+        if STOP.is_set():
+            raise ShutdownRequested()
+        yield
+    finally:
+        _waiting = False
+
+
+class Deadline:
+    """Срок, к которому нужно успеть завершиться."""
+
+    def __init__(self, timeout: float = SHUTDOWN_TIMEOUT,
+                 clock=time.monotonic, start: float = None):
+        self._clock = clock
+        self.expires = (clock() if start is None else start) + timeout
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось, не меньше нуля."""
+        return max(0.0, self.expires - self._clock())
+
+
+def deadline(timeout: float = SHUTDOWN_TIMEOUT) -> Deadline:
+    """Срок остановки, отсчитанный от сигнала, а не от конца опроса."""
+    return Deadline(timeout, start=_requested_at)
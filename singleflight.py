@@ -0,0 +1,78 @@
+"""Объединение одновременных одинаковых запросов (single-flight)."""
+import asyncio
+import threading
+
+import metrics
+
+
+class Call:
+    """Выполняющийся вызов, результата которого ждут остальные."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Одновременные вызовы с одним ключом разделяют один результат.
+
+    Первый вызов выполняет функцию, остальные ждут его и получают
+    тот же результат или то же исключение. Как только вызов
+    завершился, следующий с тем же ключом выполняется заново.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+
+    def do(self, key, function, *args):
+        """Вызов function(*args) для блокирующего кода."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Call()
+        if not leader:
+            metrics.COALESCED_REQUESTS.labels('sync').inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function(*args)
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, function, *args):
+        """Вызов await function(*args) в одном цикле событий."""
+        future = self._futures.get(key)
+        if future is not None:
+            metrics.COALESCED_REQUESTS.labels('async').inc()
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        try:
+            result = await function(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # исключение забирают ожидающие, если они есть
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[key]
@@ -0,0 +1,287 @@
+"""Хранилище состояния опроса: отметка времени и статусы работ."""
+import sqlite3
+import sys
+import threading
+from array import array
+from datetime import datetime, timezone
+
+MISSING = object()
+UNKNOWN_STATUS = -1
+
+
+def parse_date(value) -> int:
+    """Дата из ответа API (2020-02-13T14:40:57Z) в секундах эпохи."""
+    if not value:
+        return 0
+    try:
+        moment = datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+    except (TypeError, ValueError):
+        return 0
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+class HomeworkState:
+    """Состояние одной работы: статус — индекс в таблице статусов."""
+
+    __slots__ = ('tenant', 'homework_name', 'status', 'updated')
+
+    def __init__(self, tenant: str, homework_name: str, status: int,
+                 updated: int = 0):
+        self.tenant = tenant
+        self.homework_name = homework_name
+        self.status = status
+        self.updated = updated
+
+    def __repr__(self):
+        return (f'HomeworkState({self.tenant}, {self.homework_name!r}, '
+                f'status={self.status}, updated={self.updated})')
+
+
+class HomeworkTable:
+    """Компактная таблица статусов работ всех подписчиков.
+
+    Статус хранится байтом — индексом в списке статусов, дата
+    изменения — целым в array. Ключ (подписчик, работа) склеивается
+    в одну строку, чтобы не держать кортеж на каждую работу.
+    Объекты HomeworkState создаются только при чтении. Запись
+    идёт под блокировкой: в пуле потоков подписчиков пишут параллельно.
+    """
+
+    SEPARATOR = '\x1f'
+
+    def __init__(self, statuses=()):
+        self._lock = threading.Lock()
+        self._names = []
+        self._codes = {}
+        for status in statuses:
+            self.code(status)
+        self._rows = {}
+        self._keys = []
+        self._tenants = {}
+        self._statuses = array('b')
+        self._updated = array('q')
+
+    def code(self, status) -> int:
+        """Индекс статуса, новые статусы добавляются в конец."""
+        if status is None:
+            return UNKNOWN_STATUS
+        code = self._codes.get(status)
+        if code is None:
+            code = len(self._names)
+            self._names.append(sys.intern(status))
+            self._codes[status] = code
+        return code
+
+    def status_name(self, code: int):
+        """Имя статуса по индексу."""
+        return None if code == UNKNOWN_STATUS else self._names[code]
+
+    def set(self, tenant: str, homework_name: str, status,
+            updated: int = 0):
+        """Записываем статус работы."""
+        key = tenant + self.SEPARATOR + homework_name
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._statuses)
+                self._rows[key] = row
+                self._keys.append(key)
+                self._statuses.append(self.code(status))
+                self._updated.append(updated)
+                self._tenants.setdefault(sys.intern(tenant),
+                                         array('l')).append(row)
+                return
+            self._statuses[row] = self.code(status)
+            self._updated[row] = updated
+
+    def get_status(self, tenant: str, homework_name: str, default=None):
+        """Имя статуса работы или default, если работы нет."""
+        row = self._rows.get(tenant + self.SEPARATOR + homework_name)
+        if row is None:
+            return default
+        return self.status_name(self._statuses[row])
+
+    def get(self, tenant: str, homework_name: str):
+        """HomeworkState работы или None."""
+        row = self._rows.get(tenant + self.SEPARATOR + homework_name)
+        if row is None:
+            return None
+        return HomeworkState(tenant, homework_name, self._statuses[row],
+                             self._updated[row])
+
+    def tenant_homeworks(self, tenant: str) -> list:
+        """Все известные работы подписчика."""
+        start = len(tenant) + len(self.SEPARATOR)
+        return [
+            HomeworkState(tenant, self._keys[row][start:],
+                          self._statuses[row], self._updated[row])
+            for row in self._tenants.get(tenant, ())
+        ]
+
+    def __len__(self):
+        return len(self._statuses)
+
+
+class StateStore:
+    """Интерфейс хранилища состояния подписчиков."""
+
+    def get_checkpoint(self, tenant_key: str):
+        """Последняя сохранённая отметка current_date или None."""
+        raise NotImplementedError
+
+    def set_checkpoint(self, tenant_key: str, timestamp: int):
+        """Сохраняем отметку, с которой продолжать опрос."""
+        raise NotImplementedError
+
+    def get_status(self, tenant_key: str, homework_name: str):
+        """Последний известный статус работы или None."""
+        raise NotImplementedError
+
+    def set_status(self, tenant_key: str, homework_name: str, status: str,
+                   updated: int = 0):
+        """Запоминаем статус, о котором подписчик уже уведомлён."""
+        raise NotImplementedError
+
+    def homeworks(self, tenant_key: str) -> list:
+        """Известные работы подписчика: пары (название, статус)."""
+        raise NotImplementedError
+
+    def copy_tenant(self, source_key: str, target_key: str):
+        """Переносим отметку и статусы подписчика под новый ключ."""
+        checkpoint = self.get_checkpoint(source_key)
+        if checkpoint is not None:
+            self.set_checkpoint(target_key, checkpoint)
+        for homework_name, status in self.homeworks(source_key):
+            self.set_status(target_key, homework_name, status)
+
+    def close(self):
+        """Освобождаем ресурсы хранилища."""
+
+
+class MemoryStateStore(StateStore):
+    """Состояние в памяти процесса, теряется при перезапуске."""
+
+    def __init__(self, statuses=()):
+        self._checkpoints = {}
+        self._table = HomeworkTable(statuses)
+
+    def get_checkpoint(self, tenant_key):
+        return self._checkpoints.get(tenant_key)
+
+    def set_checkpoint(self, tenant_key, timestamp):
+        self._checkpoints[tenant_key] = timestamp
+
+    def get_status(self, tenant_key, homework_name):
+        return self._table.get_status(tenant_key, homework_name)
+
+    def set_status(self, tenant_key, homework_name, status, updated=0):
+        self._table.set(tenant_key, homework_name, status, updated)
+
+    def homeworks(self, tenant_key):
+        table = self._table
+        return [(record.homework_name, table.status_name(record.status))
+                for record in table.tenant_homeworks(tenant_key)]
+
+
+class SQLiteStateStore(StateStore):
+    """Состояние в SQLite-файле, переживает перезапуски.
+
+    Журнал WAL: каждая запись дописывается в журнал одной строкой,
+    файл базы целиком не перезаписывается. Прочитанные статусы
+    кешируются в памяти, чтобы сравнение ответа не ходило в базу.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS checkpoints ('
+        ' tenant TEXT PRIMARY KEY,'
+        ' timestamp INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS statuses ('
+        ' tenant TEXT NOT NULL,'
+        ' homework_name TEXT NOT NULL,'
+        ' status TEXT NOT NULL,'
+        ' updated INTEGER NOT NULL DEFAULT 0,'
+        ' PRIMARY KEY (tenant, homework_name))',
+    )
+
+    def __init__(self, path: str, statuses=()):
+        self.path = path
+        self._lock = threading.Lock()
+        self._statuses = HomeworkTable(statuses)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+            columns = [row[1] for row in self._connection.execute(
+                'PRAGMA table_info(statuses)'
+            )]
+            if 'updated' not in columns:
+                self._connection.execute(
+                    'ALTER TABLE statuses '
+                    'ADD COLUMN updated INTEGER NOT NULL DEFAULT 0'
+                )
+
+    def _fetch_one(self, query, params):
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def _write(self, query, params):
+        with self._lock, self._connection:
+            self._connection.execute(query, params)
+
+    def get_checkpoint(self, tenant_key):
+        return self._fetch_one(
+            'SELECT timestamp FROM checkpoints WHERE tenant = ?',
+            (tenant_key,)
+        )
+
+    def set_checkpoint(self, tenant_key, timestamp):
+        self._write(
+            'INSERT INTO checkpoints (tenant, timestamp) VALUES (?, ?) '
+            'ON CONFLICT (tenant) '
+            'DO UPDATE SET timestamp = excluded.timestamp',
+            (tenant_key, timestamp)
+        )
+
+    def get_status(self, tenant_key, homework_name):
+        status = self._statuses.get_status(tenant_key, homework_name,
+                                           MISSING)
+        if status is MISSING:
+            status = self._fetch_one(
+                'SELECT status FROM statuses '
+                'WHERE tenant = ? AND homework_name = ?',
+                (tenant_key, homework_name)
+            )
+            self._statuses.set(tenant_key, homework_name, status)
+        return status
+
+    def set_status(self, tenant_key, homework_name, status, updated=0):
+        self._statuses.set(tenant_key, homework_name, status, updated)
+        self._write(
+            'INSERT INTO statuses (tenant, homework_name, status, updated) '
+            'VALUES (?, ?, ?, ?) ON CONFLICT (tenant, homework_name) '
+            'DO UPDATE SET status = excluded.status, '
+            'updated = excluded.updated',
+            (tenant_key, homework_name, status, updated)
+        )
+
+    def homeworks(self, tenant_key):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT homework_name, status FROM statuses '
+                'WHERE tenant = ? ORDER BY updated',
+                (tenant_key,)
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def open_store(path: str = None, statuses=()) -> StateStore:
+    """SQLite-хранилище по пути или хранилище в памяти без него."""
+    if path:
+        return SQLiteStateStore(path, statuses)
+    return MemoryStateStore(statuses)
@@ -0,0 +1,117 @@
+"""Реестр подписчиков бота: пары токен Практикума / чат Telegram."""
+import hashlib
+import json
+
+from exceptions import ErrorEnv
+
+
+def make_key(token: str) -> str:
+    """Ключ подписчика: сам токен в логах и хранилищах не светим."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class Tenant:
+    """Подписчик и состояние его опроса."""
+
+    __slots__ = ('token', 'chat_id', 'identity', 'key', 'headers', 'locale',
+                 'timestamp', 'interval', 'reviewing', 'polled_at',
+                 'check_requested')
+
+    def __init__(self, token: str, chat_id, timestamp: int = 0,
+                 locale: str = None, tenant_id=None):
+        self.chat_id = chat_id
+        self.locale = locale
+        # явный id переживает смену токена, без него подписчик — токен
+        self.identity = token if tenant_id is None else str(tenant_id)
+        self.key = make_key(self.identity)
+        self.set_token(token)
+        self.timestamp = timestamp
+        self.interval = 0
+        self.reviewing = False
+        self.polled_at = 0.0
+        self.check_requested = False
+
+    def set_token(self, token: str):
+        """Меняем токен Практикума, ключ подписчика остаётся прежним."""
+        self.token = token
+        self.headers = {'Authorization': f'OAuth {token}'}
+
+    def __repr__(self):
+        return f'Tenant({self.key}, chat={self.chat_id})'
+
+
+class TenantRegistry:
+    """Подписчики процесса, индексированные по ключу."""
+
+    def __init__(self, tenants=()):
+        self._tenants = {}
+        self._chats = {}
+        for tenant in tenants:
+            self.add(tenant)
+
+    def add(self, tenant: Tenant):
+        """Добавляем подписчика, заменяя прежнего с тем же ключом."""
+        self.remove(tenant.key)
+        self._tenants[tenant.key] = tenant
+        self._chats.setdefault(str(tenant.chat_id), set()).add(tenant.key)
+
+    def remove(self, key: str):
+        """Удаляем подписчика, если он есть."""
+        tenant = self._tenants.pop(key, None)
+        if tenant is not None:
+            keys = self._chats.get(str(tenant.chat_id), set())
+            keys.discard(key)
+            if not keys:
+                self._chats.pop(str(tenant.chat_id), None)
+        return tenant
+
+    def get(self, key: str):
+        """Подписчик по ключу или None."""
+        return self._tenants.get(key)
+
+    def by_chat(self, chat_id) -> list:
+        """Подписчики, уведомления которых уходят в чат."""
+        return [self._tenants[key]
+                for key in list(self._chats.get(str(chat_id), ()))
+                if key in self._tenants]
+
+    def __iter__(self):
+        # копия: реестр могут менять, пока идёт обход
+        return iter(list(self._tenants.values()))
+
+    def __len__(self):
+        return len(self._tenants)
+
+    def __contains__(self, key):
+        return key in self._tenants
+
+
+def parse_tenants(items) -> list:
+    """Проверяем описания подписчиков и создаём объекты Tenant."""
+    if not isinstance(items, list):
+        raise ErrorEnv('Список подписчиков должен быть JSON-массивом')
+
+    tenants = []
+    for number, item in enumerate(items):
+        variables = [
+            name for name in ('practicum_token', 'chat_id')
+            if not isinstance(item, dict) or not item.get(name)
+        ]
+        if variables:
+            raise ErrorEnv(f'Подписчик №{number}: не определена(ы) '
+                           'переменная(ые): ' + ', '.join(variables))
+        tenants.append(Tenant(item['practicum_token'], item['chat_id'],
+                              locale=item.get('locale'),
+                              tenant_id=item.get('id')))
+    return tenants
+
+
+def load_tenants(path: str) -> list:
+    """Читаем подписчиков из JSON-файла."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            items = json.load(file)
+    except (OSError, ValueError) as error:
+        raise ErrorEnv(f'Не удалось прочитать файл подписчиков {path}: '
+                       f'{error}')
+    return parse_tenants(items)
@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -26,3 +28,17 @@ os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
 
+
+@pytest.fixture(autouse=True)
+def process_state():
+    """Автоматы защиты, отпечатки ошибок, кеш ответов и флаг
+    остановки общие для процесса: они не переходят между тестами."""
+    yield
+    import breaker
+    import homework
+    import shutdown
+    shutdown.reset()
+    breaker.PRACTICUM.reset()
+    breaker.TELEGRAM.reset()
+    homework.ERROR_DEDUP.clear()
+    homework.RESPONSE_CACHE.clear()
@@ -0,0 +1,174 @@
+import json
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+
+DAY = 24 * 60 * 60
+NOW = 10 * DAY
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+HISTORY = [
+    {'homework_name': 'hw1', 'status': 'approved', 'date_updated': iso(DAY)},
+    {'homework_name': 'hw2', 'status': 'rejected',
+     'date_updated': iso(4 * DAY)},
+    {'homework_name': 'hw3', 'status': 'reviewing',
+     'date_updated': iso(8 * DAY)},
+]
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=HTTPStatus.OK):
+        self.status_code = status_code
+        self.body = json.dumps(data).encode()
+
+    def iter_content(self, size):
+        for index in range(0, len(self.body), 16):
+            yield self.body[index:index + 16]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, params=None, **kwargs):
+        from_date = params['from_date']
+        self.requested.append(from_date)
+        works = [work for work in HISTORY
+                 if work['date_updated'] >= iso(from_date)]
+        return FakeResponse({'homeworks': works, 'current_date': NOW})
+
+
+@pytest.fixture
+def backfill_module():
+    import backfill
+    import transport
+    yield backfill
+    transport.set_session(None)
+
+
+def run(backfill_module, store, session, notify=None):
+    import tenants
+    import transport
+    transport.set_session(session)
+    backfill = backfill_module.Backfill(store, batch=1, rate=1000,
+                                        notify=notify)
+    tenant = tenants.Tenant('token', 1)
+    return backfill, tenant, backfill.run(tenant, 0)
+
+
+class TestBackfill:
+
+    def test_single_request_records_each_status_once(self,
+                                                     backfill_module):
+        import state
+        store = state.MemoryStateStore()
+        sent = []
+        session = FakeSession()
+        backfill, tenant, changes = run(
+            backfill_module, store, session,
+            notify=lambda tenant, message: sent.append(message)
+        )
+
+        assert session.requested == [0], (
+            'История читается одним запросом от since.'
+        )
+        assert changes == 3 and len(sent) == 3, (
+            'Каждый статус записывается и отправляется один раз.'
+        )
+        assert ['hw1' in sent[0], 'hw3' in sent[2]] == [True, True], (
+            'Изменения записываются от старых к новым.'
+        )
+        assert store.get_checkpoint(tenant.key) == NOW, (
+            'Обычный опрос продолжает с конца прохода.'
+        )
+        assert backfill.run(tenant, 0) == 0
+        assert session.requested[-1] == NOW, (
+            'Пройденная история повторно не запрашивается.'
+        )
+
+    def test_malformed_response_commits_nothing(self, backfill_module):
+        import state
+        import tenants
+        from exceptions import ErrorResponseData
+
+        class BrokenSession(FakeSession):
+            def get(self, url, params=None, **kwargs):
+                self.requested.append(params['from_date'])
+                return FakeResponse({'homeworks': HISTORY})
+
+        store = state.MemoryStateStore()
+        with pytest.raises(ErrorResponseData):
+            run(backfill_module, store, BrokenSession())
+        assert store.homeworks(tenants.Tenant('token', 1).key) == [], (
+            'Статусы из неполного ответа не записываются.'
+        )
+
+    def test_interrupted_run_resumes(self, backfill_module):
+        import shutdown
+        import state
+        store = state.MemoryStateStore()
+        sent = []
+
+        def notify_then_stop(tenant, message):
+            sent.append(message)
+            shutdown.STOP.set()
+
+        _, tenant, changes = run(backfill_module, store, FakeSession(),
+                                 notify=notify_then_stop)
+        assert changes == 1
+        shutdown.STOP.clear()
+
+        session = FakeSession()
+        _, tenant, changes = run(backfill_module, store, session)
+
+        assert session.requested == [DAY], (
+            'Прерванный проход продолжается с отметки последней записи.'
+        )
+        assert changes == 2, 'Без notify статусы записываются молча.'
+        assert len(sent) == 1
+        assert store.get_status(tenant.key, 'hw3') == 'reviewing'
+
+    def test_main_sends_whole_queue(self, monkeypatch, backfill_module):
+        import homework
+        import shutdown
+        import telegram
+        import transport
+
+        class SlowBot:
+            sent = []
+
+            def __init__(self, token=None):
+                pass
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                time.sleep(0.05)
+                self.sent.append(text)
+
+        for name, value in (('PRACTICUM_TOKEN', 'token'),
+                            ('TELEGRAM_TOKEN', '1234:abcdefg'),
+                            ('TELEGRAM_CHAT_ID', '1'),
+                            ('TENANTS_FILE', None),
+                            ('STATE_PATH', None)):
+            monkeypatch.setattr(homework, name, value)
+        monkeypatch.setattr(telegram, 'Bot', SlowBot)
+        monkeypatch.setattr(transport, 'create_session', FakeSession)
+        monkeypatch.setattr(shutdown, 'install', dict)
+        monkeypatch.setattr(shutdown, 'SHUTDOWN_TIMEOUT', 0)
+
+        backfill_module.main(['--since', '0', '--notify'])
+
+        sent = '\n'.join(SlowBot.sent)
+        assert all(name in sent for name in ('hw1', 'hw2', 'hw3')), (
+            'Без сигнала очередь отправляется целиком, без срока.'
+        )
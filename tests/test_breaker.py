@@ -0,0 +1,215 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import utils
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def breaker_module():
+    import breaker
+    return breaker
+
+
+class TestBreaker:
+
+    def test_opens_and_recovers(self, breaker_module):
+        clock = FakeClock()
+        circuit = breaker_module.CircuitBreaker('test', failures=2,
+                                                reset_timeout=10,
+                                                clock=clock)
+        circuit.failure()
+        assert circuit.state == breaker_module.CLOSED
+        circuit.failure()
+        assert circuit.state == breaker_module.OPEN, (
+            'После порога сбоев автомат должен размыкаться.'
+        )
+        assert not circuit.allow()
+
+        clock.now = 10
+        assert circuit.allow(), 'После таймаута нужен пробный запрос.'
+        assert not circuit.allow(), 'Пробный запрос должен быть один.'
+        circuit.failure()
+        assert circuit.state == breaker_module.OPEN, (
+            'Сбой пробного запроса снова размыкает автомат.'
+        )
+
+        clock.now = 20
+        assert circuit.allow()
+        circuit.success()
+        assert circuit.state == breaker_module.CLOSED
+        assert circuit.allow()
+
+    def test_announce_once_per_outage(self, breaker_module):
+        circuit = breaker_module.CircuitBreaker('test', failures=1)
+        assert not circuit.announce()
+        circuit.failure()
+        assert circuit.announce()
+        assert not circuit.announce(), (
+            'О размыкании нужно сообщать один раз.'
+        )
+        circuit.success()
+        circuit.failure()
+        assert circuit.announce()
+
+    def test_open_circuit_fails_fast(self, monkeypatch, breaker_module,
+                                     homework_module):
+        import engine
+        import tenants
+        calls = []
+
+        def mocked_get(*args, **kwargs):
+            calls.append(kwargs)
+            return utils.MockResponseGET(
+                http_status=HTTPStatus.SERVICE_UNAVAILABLE
+            )
+
+        class RecordingBot:
+            sent = []
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append((chat_id, text))
+
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        monkeypatch.setattr(homework_module, 'ALERT_CHAT_ID', 'alerts')
+        registry = tenants.TenantRegistry(
+            tenants.Tenant(f'token-{number}', number)
+            for number in range(breaker_module.PRACTICUM.failures + 3)
+        )
+        bot = RecordingBot()
+        engine.PollingEngine(registry, bot).run_once()
+
+        assert len(calls) == breaker_module.PRACTICUM.failures, (
+            'При разомкнутом автомате запросы к API не отправляются.'
+        )
+        alerts = [text for chat_id, text in bot.sent if chat_id == 'alerts']
+        assert len(alerts) == 1, (
+            'О недоступности API должно уходить одно общее сообщение.'
+        )
+        assert len(bot.sent) == breaker_module.PRACTICUM.failures + 1
+
+    def test_failed_trial_does_not_wedge_circuit(self, monkeypatch,
+                                                 breaker_module,
+                                                 homework_module):
+        import asyncio
+
+        import transport
+        from exceptions import ErrorCircuitOpen
+        clock = FakeClock()
+        circuit = breaker_module.CircuitBreaker('test', failures=1,
+                                                reset_timeout=10,
+                                                clock=clock)
+        monkeypatch.setattr(breaker_module, 'PRACTICUM', circuit)
+
+        class BrokenClient:
+            async def get(self, url, headers, params):
+                return transport.RawResponse(HTTPStatus.OK, {},
+                                             b'<html>upstream error</html>')
+
+        circuit.failure()
+        clock.now = 10
+        with pytest.raises(ValueError):
+            asyncio.run(homework_module.fetch_homeworks_async(
+                0, {}, BrokenClient()
+            ))
+        assert circuit.state == breaker_module.OPEN, (
+            'Любой сбой пробного запроса снова размыкает автомат.'
+        )
+        clock.now = 20
+        assert circuit.allow(), 'После таймаута нужен новый пробный запрос.'
+
+        clock.now = 25
+        with pytest.raises(ErrorCircuitOpen):
+            circuit.before_call()
+        clock.now = 30
+        assert circuit.allow(), (
+            'Пробный запрос без итога не должен блокировать автомат навсегда.'
+        )
+
+    def test_failed_sync_trial_reopens_circuit(self, monkeypatch,
+                                               breaker_module,
+                                               homework_module):
+        import transport
+        clock = FakeClock()
+        circuit = breaker_module.CircuitBreaker('test', failures=1,
+                                                reset_timeout=10,
+                                                clock=clock)
+        monkeypatch.setattr(breaker_module, 'PRACTICUM', circuit)
+
+        class HtmlResponse:
+            status_code = HTTPStatus.OK
+            headers = {'Content-Type': 'text/html'}
+            content = b'<html>upstream error</html>'
+
+        class HtmlSession:
+            def get(self, url, **kwargs):
+                return HtmlResponse()
+
+        monkeypatch.setattr(transport, 'get_session', HtmlSession)
+        homework_module.RESPONSE_CACHE.clear()
+        circuit.failure()
+        clock.now = 10
+        with pytest.raises(ValueError):
+            homework_module.fetch_homeworks(0, {'Authorization': 'key'})
+        assert circuit.state == breaker_module.OPEN, (
+            'Ответ 200 без JSON на пробный запрос снова размыкает автомат.'
+        )
+
+    def test_open_telegram_circuit_keeps_message(self, monkeypatch,
+                                                 breaker_module,
+                                                 homework_module):
+        import time
+
+        import telegram
+
+        class RecordingBot:
+            sent = []
+
+            def __init__(self, token=None):
+                pass
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append(text)
+
+        def mocked_get(*args, **kwargs):
+            response = utils.MockResponseGET(http_status=HTTPStatus.OK)
+            response.json = lambda: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1
+            }
+            return response
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) > 1:
+                raise utils.BreakInfiniteLoop('break')
+            breaker_module.TELEGRAM.reset()
+
+        for name, value in (('PRACTICUM_TOKEN', 'sometoken'),
+                            ('TELEGRAM_TOKEN', '1234:abcdefg'),
+                            ('TELEGRAM_CHAT_ID', '12345')):
+            monkeypatch.setattr(homework_module, name, value)
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        monkeypatch.setattr(telegram, 'Bot', RecordingBot)
+        monkeypatch.setattr(time, 'sleep', sleep)
+        for _ in range(breaker_module.TELEGRAM.failures):
+            breaker_module.TELEGRAM.failure()
+
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        assert len(RecordingBot.sent) == 1 and 'hw' in RecordingBot.sent[0], (
+            'Сообщение, отложенное разомкнутым автоматом, '
+            'должно уйти после его замыкания.'
+        )
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import utils
+
+
+class CommandBot:
+    def __init__(self, updates=()):
+        self.updates = list(updates)
+        self.sent = []
+
+    def get_updates(self, offset=None, **kwargs):
+        return [update for update in self.updates
+                if offset is None or update.update_id >= offset]
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def update(update_id, chat_id, text):
+    return SimpleNamespace(
+        update_id=update_id,
+        message=SimpleNamespace(chat_id=chat_id, text=text),
+    )
+
+
+@pytest.fixture
+def receiver_parts():
+    import commands
+    import engine
+    import tenants
+    tenant = tenants.Tenant('token', 100)
+    return commands, engine, tenants, tenant
+
+
+class TestCommands:
+
+    def test_status_served_from_store(self, monkeypatch, receiver_parts):
+        commands, engine, tenants, tenant = receiver_parts
+
+        def no_requests(*args, **kwargs):
+            raise AssertionError('/status не должен обращаться к API.')
+
+        monkeypatch.setattr(requests, 'get', no_requests)
+        bot = CommandBot([update(1, 100, '/status'),
+                          update(2, 999, '/status')])
+        polling = engine.PollingEngine(tenants.TenantRegistry([tenant]), bot)
+        polling.store.set_status(tenant.key, 'hw1', 'approved')
+        receiver = commands.CommandReceiver(bot, polling)
+
+        assert receiver.receive() == 2
+        assert bot.sent == [(100, '"hw1": Работа проверена: ревьюеру '
+                                  'всё понравилось. Ура!')], (
+            'На /status нужно ответить статусами из хранилища, '
+            'чужие чаты игнорировать.'
+        )
+        assert receiver.receive() == 0, (
+            'Обработанные обновления не должны приходить повторно.'
+        )
+
+    def test_check_moves_next_poll(self, monkeypatch, receiver_parts):
+        commands, engine, tenants, tenant = receiver_parts
+        calls = []
+
+        def mocked_get(*args, **kwargs):
+            calls.append(kwargs)
+            response = utils.MockResponseGET(http_status=HTTPStatus.OK,
+                                             random_timestamp=1)
+            return response
+
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        bot = CommandBot([update(1, 100, '/check@homework_bot')])
+        polling = engine.PollingEngine(tenants.TenantRegistry([tenant]), bot,
+                                       retry_period=600)
+        polling.scheduler.schedule(tenant.key, 600)
+        commands.CommandReceiver(bot, polling).receive()
+        polling.process_events(polling.events, timeout=1)
+
+        assert not calls, '/check не должен сразу обращаться к API.'
+        assert polling.scheduler.time_until(tenant.key) < 1, (
+            '/check должен переносить ближайший опрос вперёд.'
+        )
+        polling.run_pending()
+
+        assert len(calls) == 1
+        assert [text for _, text in bot.sent] == [
+            commands.CHECK_ACCEPTED, commands.NO_CHANGES
+        ], 'После опроса подписчик должен получить ответ на /check.'
+
+    def test_plain_text_ignored(self, receiver_parts):
+        commands, engine, tenants, tenant = receiver_parts
+        bot = CommandBot([update(1, 100, 'спасибо!'),
+                          update(2, 100, '/start')])
+        polling = engine.PollingEngine(tenants.TenantRegistry([tenant]), bot)
+        commands.CommandReceiver(bot, polling).receive()
+
+        assert bot.sent == [(100, commands.HELP)], (
+            'Отвечать нужно только на команды, начинающиеся с /.'
+        )
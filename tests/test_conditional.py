@@ -0,0 +1,139 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, data=None, status_code=HTTPStatus.OK, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode() if data else b''
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(kwargs)
+        return self.responses.pop(0)
+
+
+def answer(current_date, status='approved'):
+    return {
+        'homeworks': [{'homework_name': 'hw1', 'status': status}],
+        'current_date': current_date,
+    }
+
+
+@pytest.fixture
+def homework_cache(homework_module):
+    import transport
+    homework_module.RESPONSE_CACHE.clear()
+    yield homework_module
+    homework_module.RESPONSE_CACHE.clear()
+    transport.set_session(None)
+
+
+def poll(homework_module, responses):
+    import transport
+    session = FakeSession(responses)
+    transport.set_session(session)
+    results = []
+    for _ in responses:
+        result = homework_module.get_api_answer(0)
+        homework_module.check_response(result)
+        homework_module.confirm_answer(result)
+        results.append(result)
+    return results, session
+
+
+class TestConditional:
+
+    def test_same_body_skips_parsing(self, homework_cache):
+        import conditional
+        import metrics
+        skipped = metrics.SKIPPED_HOMEWORKS.value
+        results, _ = poll(homework_cache, [
+            FakeResponse(answer(1)), FakeResponse(answer(2)),
+            FakeResponse(answer(3, 'reviewing')),
+        ])
+
+        assert isinstance(results[1], conditional.NotModified), (
+            'Ответ, отличающийся только current_date, разбирать не нужно.'
+        )
+        assert results[1]['current_date'] == 2, (
+            'Отметка опроса должна браться из нового ответа.'
+        )
+        assert results[1]['homeworks'] == []
+        assert results[2]['homeworks'][0]['status'] == 'reviewing', (
+            'Изменившийся ответ должен разбираться заново.'
+        )
+        assert metrics.SKIPPED_HOMEWORKS.value == skipped + 1
+
+    def test_unconfirmed_answer_not_cached(self, homework_cache):
+        import conditional
+        import transport
+        transport.set_session(FakeSession([
+            FakeResponse(answer(1)), FakeResponse(answer(2)),
+        ]))
+        homework_cache.get_api_answer(0)
+        second = homework_cache.get_api_answer(0)
+
+        assert not isinstance(second, conditional.NotModified), (
+            'Необработанный ответ не должен попадать в кеш.'
+        )
+
+    def test_etag_sent_and_304_keeps_timestamp(self, homework_cache):
+        import conditional
+        results, session = poll(homework_cache, [
+            FakeResponse(answer(1), headers={'ETag': '"v1"'}),
+            FakeResponse(status_code=HTTPStatus.NOT_MODIFIED),
+        ])
+
+        assert session.calls[1]['headers']['If-None-Match'] == '"v1"', (
+            'Повторный запрос должен передавать ETag прошлого ответа.'
+        )
+        assert 'If-None-Match' not in session.calls[0]['headers']
+        assert isinstance(results[1], conditional.NotModified)
+        assert results[1]['current_date'] == 0, (
+            'На 304 отметка опроса не должна меняться.'
+        )
+
+    def test_async_client_goes_through_cache(self, homework_cache):
+        import asyncio
+
+        import conditional
+        import transport
+
+        class FakeClient:
+            def __init__(self, responses):
+                self.responses = list(responses)
+                self.calls = []
+
+            async def get(self, url, headers, params):
+                self.calls.append(headers)
+                response = self.responses.pop(0)
+                return transport.RawResponse(response.status_code,
+                                             response.headers,
+                                             response.content)
+
+        client = FakeClient([
+            FakeResponse(answer(1), headers={'ETag': '"v1"'}),
+            FakeResponse(status_code=HTTPStatus.NOT_MODIFIED),
+        ])
+        results = []
+        for _ in range(2):
+            result = asyncio.run(homework_cache.get_api_answer_async(
+                0, client
+            ))
+            homework_cache.check_response(result)
+            homework_cache.confirm_answer(result)
+            results.append(result)
+
+        assert client.calls[1]['If-None-Match'] == '"v1"', (
+            'Асинхронный запрос тоже должен передавать ETag.'
+        )
+        assert isinstance(results[1], conditional.NotModified)
@@ -0,0 +1,136 @@
+import json
+import os
+
+import pytest
+
+from exceptions import ErrorEnv
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def config_module(monkeypatch):
+    import config
+    import homework
+    for name in ('TELEGRAM_TOKEN', 'RETRY_PERIOD', 'ENDPOINT',
+                 'HOMEWORK_VERDICTS', 'VALIDATORS'):
+        monkeypatch.setattr(homework, name, getattr(homework, name))
+    verdicts = homework.HOMEWORK_VERDICTS
+    yield config
+    homework.RENDERER.compile(verdicts)
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    # время изменения должно отличаться даже на грубых файловых системах
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestConfig:
+
+    def test_validation_matches_check_tokens(self, config_module):
+        with pytest.raises(ErrorEnv, match='TELEGRAM_TOKEN'):
+            config_module.parse_config({'telegram_token': ''})
+        with pytest.raises(ErrorEnv, match='PRACTICUM_TOKEN'):
+            config_module.parse_config({'practicum_token': '',
+                                        'chat_id': 1})
+        with pytest.raises(ErrorEnv, match='retry_period'):
+            config_module.parse_config({'retry_period': -1})
+        with pytest.raises(ErrorEnv):
+            config_module.parse_config({'tenants': [{'chat_id': 1}]})
+
+        parsed = config_module.parse_config([
+            {'practicum_token': 'a', 'chat_id': 1}
+        ])
+        assert [tenant.token for tenant in parsed.tenants] == ['a'], (
+            'Список верхнего уровня — это подписчики.'
+        )
+
+    def test_watcher_skips_invalid_file(self, config_module, tmp_path):
+        path = tmp_path / 'config.json'
+        tenant = {'practicum_token': 'token', 'chat_id': 1}
+        write(path, dict(tenant, retry_period=60))
+        applied = []
+        watcher = config_module.ConfigWatcher(str(path), applied.append)
+
+        assert not watcher.check(), 'Без изменений файл не перечитывается.'
+        write(path, dict(tenant, retry_period='часто'))
+        assert not watcher.check(), (
+            'Некорректная конфигурация не должна применяться.'
+        )
+        write(path, dict(tenant, retry_period=120))
+        assert watcher.check()
+        assert applied[0].retry_period == 120
+
+    def test_engine_applies_changes_in_place(self, config_module):
+        import engine
+        import homework
+        import tenants
+        kept = tenants.Tenant('kept', 1)
+        registry = tenants.TenantRegistry([kept, tenants.Tenant('gone', 2)])
+        polling = engine.PollingEngine(registry, RecordingBot())
+        polling.start()
+        kept.timestamp = 12345
+
+        verdicts = dict(homework.HOMEWORK_VERDICTS, on_hold='Работа ждёт.')
+        polling.apply_config(config_module.parse_config({
+            'retry_period': 120,
+            'verdicts': verdicts,
+            'tenants': [
+                {'practicum_token': 'kept', 'chat_id': 10, 'locale': 'en'},
+                {'practicum_token': 'new', 'chat_id': 3},
+            ],
+        }))
+
+        assert sorted(tenant.token for tenant in polling.registry) == [
+            'kept', 'new'
+        ]
+        assert polling.registry.get(kept.key) is kept, (
+            'Оставшийся подписчик не должен пересоздаваться.'
+        )
+        assert kept.timestamp == 12345 and kept.chat_id == 10
+        assert polling.registry.by_chat(10) == [kept]
+        assert len(polling.scheduler) == 2, (
+            'Удалённый подписчик снимается с расписания.'
+        )
+        assert polling.policy.base == 120
+        assert 'Работа ждёт.' in homework.parse_status(
+            {'homework_name': 'hw', 'status': 'on_hold'}
+        ), 'Новые вердикты должны применяться к схеме и шаблонам.'
+
+    def test_token_rotation_keeps_tenant_state(self, config_module):
+        import engine
+        import tenants
+        named = tenants.Tenant('old-a', 1, tenant_id='alice')
+        plain = tenants.Tenant('old-b', 2)
+        polling = engine.PollingEngine(
+            tenants.TenantRegistry([named, plain]), RecordingBot()
+        )
+        polling.start()
+        named.timestamp = 111
+        polling.store.set_checkpoint(plain.key, 222)
+        polling.store.set_status(plain.key, 'hw1', 'reviewing')
+
+        polling.apply_tenants(tenants.parse_tenants([
+            {'practicum_token': 'new-a', 'chat_id': 1, 'id': 'alice'},
+            {'practicum_token': 'new-b', 'chat_id': 2},
+        ]))
+
+        assert polling.registry.get(named.key) is named, (
+            'Подписчик с id при смене токена не пересоздаётся.'
+        )
+        assert named.timestamp == 111
+        assert named.headers == {'Authorization': 'OAuth new-a'}
+        rotated, = polling.registry.by_chat(2)
+        assert rotated.token == 'new-b'
+        assert rotated.timestamp == 222, (
+            'Новый токен в том же чате продолжает с прежней отметки.'
+        )
+        assert polling.store.get_status(rotated.key, 'hw1') == 'reviewing'
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from exceptions import ErrorResponseData
+
+
+@pytest.fixture
+def decoding_module():
+    import decoding
+    return decoding
+
+
+def split(raw: bytes, size: int) -> list:
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+class TestDecoding:
+
+    @pytest.mark.parametrize('size', [1, 5, 4096])
+    def test_stream_yields_homeworks(self, decoding_module, size):
+        data = {
+            'homeworks': [
+                {'homework_name': f'работа {number}', 'status': 'approved',
+                 'reviewer_comment': 'ок' * 50, 'date_updated': 'x'}
+                for number in range(20)
+            ],
+            'current_date': 1234567890,
+        }
+        raw = json.dumps(data, ensure_ascii=False).encode()
+        parser = decoding_module.StreamingParser(
+            split(raw, size), keep=('homework_name', 'status')
+        )
+        homeworks = list(parser)
+
+        assert len(homeworks) == 20
+        assert homeworks[3] == {'homework_name': 'работа 3',
+                                'status': 'approved'}
+        assert parser.fields['current_date'] == 1234567890, (
+            'Число на границе фрагментов не должно обрезаться.'
+        )
+
+    def test_truncated_stream(self, decoding_module):
+        raw = b'{"homeworks": [{"homework_name": "hw", "sta'
+        with pytest.raises(ErrorResponseData):
+            list(decoding_module.StreamingParser(split(raw, 8)))
+
+    def test_decode_response_uses_content(self, decoding_module):
+        class Response:
+            content = b'{"homeworks": [], "current_date": 1}'
+
+        assert decoding_module.decode_response(Response()) == {
+            'homeworks': [], 'current_date': 1
+        }
+
+    def test_stdlib_fallback(self, decoding_module):
+        assert decoding_module.get_loads('json') is json.loads
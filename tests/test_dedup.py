@@ -0,0 +1,74 @@
+import pytest
+
+from exceptions import ErrorConnection, ErrorResponseData
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def dedup_module():
+    import dedup
+    return dedup
+
+
+def connection_error(timestamp):
+    return ErrorConnection(
+        'Ошибка подключения к узлу: https://practicum.yandex.ru/api/, '
+        f"параметры: {{'from_date': {timestamp}}}"
+    )
+
+
+class TestDedup:
+
+    def test_fingerprint_ignores_numbers(self, dedup_module):
+        assert (dedup_module.fingerprint(connection_error(1))
+                == dedup_module.fingerprint(connection_error(1700000000))), (
+            'Отметка времени в тексте не должна менять отпечаток ошибки.'
+        )
+        assert (dedup_module.fingerprint(ErrorConnection('x'))
+                != dedup_module.fingerprint(ErrorResponseData('x'))), (
+            'Отпечаток должен учитывать класс исключения.'
+        )
+
+    def test_window_and_digest(self, dedup_module):
+        clock = FakeClock()
+        errors = dedup_module.ErrorDeduplicator(window=600,
+                                                digest_interval=3600,
+                                                clock=clock)
+        assert errors.should_send(1, connection_error(1))
+        for timestamp in range(2, 39):
+            clock.now = timestamp
+            assert not errors.should_send(1, connection_error(timestamp)), (
+                'Повтор ошибки в пределах окна отправлять не нужно.'
+            )
+        assert errors.should_send(2, connection_error(1)), (
+            'Окно считается для каждого чата отдельно.'
+        )
+        assert errors.digest(1) is None, 'Сводке ещё рано.'
+
+        clock.now = 3600
+        digest = errors.digest(1)
+        assert 'ErrorConnection ×37' in digest, (
+            'Сводка должна считать подавленные повторы.'
+        )
+        assert errors.should_send(1, connection_error(3600)), (
+            'После окна об ошибке снова сообщаем.'
+        )
+        clock.now = 7200
+        assert errors.digest(1) is None, 'Без повторов сводка не нужна.'
+
+    def test_fingerprints_are_bounded(self, dedup_module):
+        errors = dedup_module.ErrorDeduplicator(size=2)
+        for text in ('a', 'b', 'c'):
+            errors.should_send(1, ErrorConnection(text))
+
+        assert errors.should_send(1, ErrorConnection('a')), (
+            'Самый давний отпечаток должен вытесняться.'
+        )
+        assert not errors.should_send(1, ErrorConnection('c'))
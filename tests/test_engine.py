@@ -0,0 +1,193 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import utils
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def engine_module():
+    import engine
+    return engine
+
+
+@pytest.fixture
+def tenants_module():
+    import tenants
+    return tenants
+
+
+def mock_get_by_token(answers):
+    def mocked_get(url, headers=None, params=None, **kwargs):
+        token = headers['Authorization'].split()[-1]
+        status, data = answers[token]
+        response = utils.MockResponseGET(http_status=status)
+        response.json = lambda: data
+        return response
+    return mocked_get
+
+
+class TestEngine:
+
+    def test_failed_tenant_does_not_stall_others(self, monkeypatch,
+                                                 engine_module,
+                                                 tenants_module):
+        answers = {
+            'good': (HTTPStatus.OK, {
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': 1
+            }),
+            'bad': (HTTPStatus.INTERNAL_SERVER_ERROR, {}),
+        }
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(answers))
+        registry = tenants_module.TenantRegistry([
+            tenants_module.Tenant('bad', 1),
+            tenants_module.Tenant('good', 2),
+        ])
+        bot = RecordingBot()
+        engine_module.PollingEngine(registry, bot).run_once()
+
+        chats = [chat_id for chat_id, _ in bot.sent]
+        assert chats == [1, 2], (
+            'Сбой одного подписчика не должен мешать опросу остальных.'
+        )
+        assert 'Сбой в работе программы' in bot.sent[0][1]
+
+    def test_invalid_tenants_raise_env_error(self, tenants_module):
+        from exceptions import ErrorEnv
+        with pytest.raises(ErrorEnv):
+            tenants_module.parse_tenants([{'practicum_token': 'x'}])
+
+    def test_tenant_key_hides_token(self, tenants_module):
+        tenant = tenants_module.Tenant('secret-token', 1)
+        assert 'secret-token' not in tenant.key
+        assert tenant.headers['Authorization'] == 'OAuth secret-token'
+
+    def test_async_poll_uses_shared_client(self, engine_module,
+                                           tenants_module):
+        import asyncio
+        import json
+
+        import transport
+
+        class FakeClient:
+            calls = 0
+
+            async def get(self, url, headers, params):
+                FakeClient.calls += 1
+                return transport.RawResponse(HTTPStatus.OK, {}, json.dumps({
+                    'homeworks': [
+                        {'homework_name': 'hw1', 'status': 'reviewing'}
+                    ],
+                    'current_date': 1
+                }).encode())
+
+        registry = tenants_module.TenantRegistry(
+            tenants_module.Tenant(f'token{number}', number)
+            for number in range(5)
+        )
+        bot = RecordingBot()
+        engine = engine_module.PollingEngine(registry, bot)
+        asyncio.run(engine.run_once_async(FakeClient()))
+
+        assert FakeClient.calls == 5
+        assert sorted(chat_id for chat_id, _ in bot.sent) == list(range(5))
+
+    def test_all_homeworks_diffed_without_duplicates(self, monkeypatch,
+                                                     engine_module,
+                                                     tenants_module):
+        answers = {'token': (HTTPStatus.OK, {
+            'homeworks': [
+                {'homework_name': 'hw2', 'status': 'reviewing'},
+                {'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 500
+        })}
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(answers))
+        tenant = tenants_module.Tenant('token', 1)
+        bot = RecordingBot()
+        engine = engine_module.PollingEngine(
+            tenants_module.TenantRegistry([tenant]), bot
+        )
+        engine.run_once()
+        engine.run_once()
+
+        texts = [text for _, text in bot.sent]
+        assert len(texts) == 2, (
+            'Каждый переход статуса должен давать ровно одно сообщение.'
+        )
+        assert '"hw1"' in texts[0] and '"hw2"' in texts[1]
+        assert tenant.timestamp == 500, (
+            'Отметку опроса нужно брать из `current_date` ответа.'
+        )
+
+    def test_threaded_poll_reschedules_all(self, monkeypatch, engine_module,
+                                           tenants_module):
+        answers = {
+            f'token-{number}': (HTTPStatus.OK, {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': number
+            })
+            for number in range(6)
+        }
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(answers))
+        registry = tenants_module.TenantRegistry(
+            tenants_module.Tenant(token, number)
+            for number, token in enumerate(answers)
+        )
+        bot = RecordingBot()
+        engine = engine_module.PollingEngine(registry, bot)
+        engine.start()
+        completed = queue.SimpleQueue()
+        slots = threading.BoundedSemaphore(2)
+        with ThreadPoolExecutor(2) as executor:
+            engine.submit_pending(executor, slots, completed)
+        engine.process_events(completed, timeout=1)
+
+        assert sorted(chat_id for chat_id, _ in bot.sent) == list(range(6)), (
+            'Каждый подписчик должен быть опрошен в пуле потоков.'
+        )
+        assert len(engine.scheduler) == 6, (
+            'После опроса в пуле подписчик снова ставится в расписание.'
+        )
+        assert engine.scheduler.pop_due() == [], (
+            'Следующий опрос не должен наступать сразу.'
+        )
+
+    def test_invalid_homework_skipped_others_reported(self, monkeypatch,
+                                                      engine_module,
+                                                      tenants_module):
+        answers = {'token': (HTTPStatus.OK, {
+            'homeworks': [
+                {'homework_name': 'a', 'status': 'approved'},
+                {'homework_name': 'b', 'status': 'weird'},
+            ],
+            'current_date': 700
+        })}
+        monkeypatch.setattr(requests, 'get', mock_get_by_token(answers))
+        tenant = tenants_module.Tenant('token', 1)
+        bot = RecordingBot()
+        engine = engine_module.PollingEngine(
+            tenants_module.TenantRegistry([tenant]), bot
+        )
+        engine.poll(tenant)
+
+        assert len(bot.sent) == 1 and '"a"' in bot.sent[0][1], (
+            'Корректные работы сообщаются, некорректная пропускается.'
+        )
+        assert tenant.timestamp == 700, (
+            'Некорректная работа не должна останавливать отметку опроса.'
+        )
+        assert engine.store.get_status(tenant.key, 'b') is None
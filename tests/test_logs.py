@@ -0,0 +1,69 @@
+import logging
+import time
+
+import pytest
+
+
+@pytest.fixture
+def logs_module():
+    import logs
+    return logs
+
+
+class TestLogs:
+
+    def test_parse_level(self, logs_module):
+        assert logs_module.parse_level('info') == logging.INFO
+        assert logs_module.parse_level('WARNING') == logging.WARNING
+        assert logs_module.parse_level('nonsense') == logging.DEBUG
+
+    def test_queue_handler_writes_in_background(self, tmp_path,
+                                                logs_module):
+        path = tmp_path / 'bot.log'
+        logger = logging.getLogger('test_logs.queue')
+        logger.propagate = False
+        handler = logs_module.configure_logger(
+            logger, level='INFO', output=str(path), use_queue=True
+        )
+        assert isinstance(handler, logs_module.DeferredQueueHandler)
+
+        logger.debug('скрыто %s', 'debug')
+        logger.info('запрос %s', {'from_date': 1})
+        for _ in range(50):
+            if path.exists() and 'запрос' in path.read_text('utf-8'):
+                break
+            time.sleep(0.05)
+        text = path.read_text('utf-8')
+        assert "запрос {'from_date': 1}" in text
+        assert 'скрыто' not in text
+
+    def test_json_records_share_cycle_id(self, logs_module):
+        import io
+        import json
+
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logs_module.JsonFormatter())
+        handler.addFilter(logs_module.ContextFilter())
+        logger = logging.getLogger('test_logs.json')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+
+        with logs_module.poll_context('tenant1'):
+            logger.debug('запрос', extra={'status_code': 200,
+                                          'duration': 0.5})
+            logger.debug('разбор')
+        with logs_module.poll_context('tenant1'):
+            logger.debug('следующий цикл')
+
+        records = [json.loads(line) for line in stream.getvalue().split('\n')
+                   if line]
+        assert records[0]['cycle_id'] == records[1]['cycle_id'], (
+            'Записи одного цикла опроса должны иметь общий идентификатор.'
+        )
+        assert records[2]['cycle_id'] != records[0]['cycle_id']
+        assert records[0]['tenant'] == 'tenant1'
+        assert records[0]['status_code'] == 200
+        assert records[0]['duration'] == 0.5
+        assert 'status_code' not in records[1]
@@ -0,0 +1,60 @@
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def metrics_module():
+    import metrics
+    return metrics
+
+
+class TestMetrics:
+
+    def test_render_counter_gauge_histogram(self, metrics_module):
+        registry = metrics_module.Registry()
+        errors = registry.counter('errors_total', 'Ошибки', ('exception',))
+        errors.labels('ErrorConnection').inc()
+        errors.labels('ErrorConnection').inc()
+        registry.gauge('tenants', 'Подписчики').set_function(lambda: 7)
+        latency = registry.histogram('latency_seconds', 'Время',
+                                     buckets=(0.1, 1))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        text = registry.render()
+        assert 'errors_total{exception="ErrorConnection"} 2' in text
+        assert 'tenants 7' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'latency_seconds_count 3' in text
+        assert '# TYPE latency_seconds histogram' in text
+
+    def test_api_errors_are_counted(self, monkeypatch, metrics_module,
+                                    homework_module, current_timestamp):
+        import requests
+
+        def failing_get(*args, **kwargs):
+            raise requests.RequestException('boom')
+
+        monkeypatch.setattr(requests, 'get', failing_get)
+        before = metrics_module.PRACTICUM_LATENCY.counts[:]
+        with pytest.raises(homework_module.ErrorConnection) as info:
+            homework_module.get_api_answer(current_timestamp)
+        metrics_module.count_error(info.value)
+
+        assert metrics_module.PRACTICUM_LATENCY.counts != before
+        assert metrics_module.ERRORS.labels('ErrorConnection').value >= 1
+
+    def test_http_endpoint(self, metrics_module):
+        server = metrics_module.start_server(0)
+        try:
+            port = server.server_address[1]
+            url = f'http://127.0.0.1:{port}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+        assert 'homework_api_request_seconds_bucket' in body
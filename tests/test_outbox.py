@@ -0,0 +1,110 @@
+import pytest
+from telegram.error import RetryAfter, TimedOut
+
+
+class FlakyBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def outbox_module(monkeypatch):
+    import outbox
+    monkeypatch.setattr(outbox.time, 'sleep', lambda secs: None)
+    return outbox
+
+
+class TestOutbox:
+
+    def test_pending_messages_coalesced_per_chat(self, outbox_module):
+        bot = FlakyBot()
+        outbox = outbox_module.Outbox(bot, rate=100, chat_rate=100)
+        outbox.put(1, 'first')
+        outbox.put(2, 'other chat')
+        outbox.put(1, 'second')
+        assert len(outbox) == 3
+        outbox.start()
+        outbox.stop(timeout=5)
+
+        assert bot.sent == [(1, 'first\n\nsecond'), (2, 'other chat')], (
+            'Ожидающие сообщения одного чата должны уходить одним.'
+        )
+
+    def test_coalesce_respects_length_limit(self, outbox_module):
+        texts = ['a' * 30, 'b' * 30, 'c' * 30]
+        messages = outbox_module.coalesce(texts, limit=70)
+        assert messages == ['a' * 30 + '\n\n' + 'b' * 30, 'c' * 30]
+
+    def test_retry_after_and_timeout_are_retried(self, outbox_module):
+        bot = FlakyBot([RetryAfter(0), TimedOut()])
+        outbox = outbox_module.Outbox(bot, chat_rate=100, retries=3,
+                                      backoff=0)
+        outbox.put(1, 'text')
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert bot.sent == [(1, 'text')]
+
+    def test_gives_up_after_retries(self, outbox_module):
+        bot = FlakyBot([TimedOut()] * 5)
+        outbox = outbox_module.Outbox(bot, chat_rate=100, retries=2,
+                                      backoff=0)
+        outbox.put(1, 'text')
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert bot.sent == []
+        assert len(bot.errors) == 2, (
+            'После retries повторов сообщение отбрасывается.'
+        )
+
+    def test_retry_after_delays_only_its_chat(self, outbox_module):
+        class SlowChatBot(FlakyBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if chat_id == 1 and not self.sent:
+                    self.sent.append(None)
+                    raise RetryAfter(0.2)
+                self.sent.append((chat_id, text))
+
+        bot = SlowChatBot()
+        outbox = outbox_module.Outbox(bot, rate=100, chat_rate=100)
+        outbox.put(1, 'limited')
+        outbox.put(2, 'free')
+        outbox.start()
+        outbox.stop(timeout=5)
+
+        assert bot.sent == [None, (2, 'free'), (1, 'limited')], (
+            'RetryAfter одного чата не должен задерживать остальные.'
+        )
+
+    def test_long_message_is_split(self, outbox_module):
+        text = 'строка\n' * 1000
+        parts = outbox_module.coalesce([text, 'x' * 5000], limit=4096)
+        assert all(len(part) <= 4096 for part in parts), (
+            'Сообщение длиннее лимита Telegram должно делиться.'
+        )
+        assert ''.join(parts).count('строка') == 1000
+        assert ''.join(parts).count('x') == 5000
+
+    def test_send_runs_in_poll_context(self, outbox_module):
+        import logs
+
+        class ContextBot(FlakyBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append((logs.cycle_id.get(), logs.tenant.get()))
+
+        bot = ContextBot()
+        outbox = outbox_module.Outbox(bot, rate=100, chat_rate=100)
+        with logs.poll_context('tenant-1'):
+            cycle = logs.cycle_id.get()
+            outbox.put(1, 'text')
+        outbox.start()
+        outbox.stop(timeout=5)
+
+        assert bot.sent == [(cycle, 'tenant-1')], (
+            'Отправка должна логироваться с cycle_id породившего опроса.'
+        )
@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def render_module():
+    import render
+    return render
+
+
+@pytest.fixture
+def verdicts(homework_module):
+    return homework_module.HOMEWORK_VERDICTS
+
+
+class TestRender:
+
+    def test_default_text_matches_parse_status(self, render_module,
+                                               verdicts):
+        renderer = render_module.Renderer(verdicts, details=False)
+        for status, verdict in verdicts.items():
+            text = renderer.render({'homework_name': 'hw {1}',
+                                    'status': status})
+            assert text == (
+                f'Изменился статус проверки работы "hw {{1}}". {verdict}'
+            )
+
+    def test_cache_counts_hits(self, render_module, verdicts):
+        renderer = render_module.Renderer(verdicts, cache_size=2)
+        homework = {'homework_name': 'hw', 'status': 'approved'}
+        renderer.render(homework)
+        renderer.render(homework)
+        renderer.render(homework, 'en')
+        info = renderer.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+        assert info.maxsize == 2
+
+    def test_locale_and_details(self, render_module, verdicts):
+        renderer = render_module.Renderer(verdicts, details=True)
+        homework = {'homework_name': 'hw', 'status': 'rejected',
+                    'lesson_name': 'Итоговый проект',
+                    'reviewer_comment': 'Поправь тесты'}
+        text = renderer.render(homework, 'en')
+        assert text.startswith('Review status of "hw" changed.')
+        assert 'Lesson: Итоговый проект' in text
+        assert text.endswith('Reviewer comment: Поправь тесты')
+        assert renderer.render(homework, 'fr').startswith('Изменился')
+
+    def test_untranslated_status_and_unknown_locale(self, render_module,
+                                                    verdicts):
+        from exceptions import ErrorEnv
+        with pytest.raises(ErrorEnv, match='de'):
+            render_module.Renderer(verdicts, default_locale='de')
+
+        renderer = render_module.Renderer(verdicts, default_locale='en')
+        renderer.compile(dict(verdicts, on_hold='Работа ждёт.'))
+        homework = {'homework_name': 'hw', 'status': 'on_hold'}
+        assert renderer.render(homework, 'ru').endswith('Работа ждёт.')
+        assert renderer.render(homework).endswith('Работа ждёт.'), (
+            'Статус без перевода берёт вердикт из настроек.'
+        )
+
+    def test_cache_totals_are_counters(self, render_module, verdicts):
+        import metrics
+        renderer = render_module.Renderer(verdicts)
+        homework = {'homework_name': 'hw', 'status': 'approved'}
+        renderer.render(homework)
+        renderer.render(homework)
+        renderer.compile(verdicts)
+        renderer.render(homework)
+        assert renderer.totals() == (1, 2), (
+            'Пересборка шаблонов не должна обнулять счётчики кеша.'
+        )
+        text = metrics.REGISTRY.render()
+        assert '# TYPE homework_render_cache_hits_total counter' in text
+        assert '# TYPE homework_render_cache_misses_total counter' in text
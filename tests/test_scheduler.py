@@ -0,0 +1,73 @@
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def scheduler_module():
+    import scheduler
+    return scheduler
+
+
+class TestScheduler:
+
+    def test_pop_due_in_order(self, scheduler_module):
+        clock = FakeClock()
+        queue = scheduler_module.Scheduler(clock=clock)
+        queue.schedule('b', 20)
+        queue.schedule('a', 10)
+        queue.schedule('c', 30)
+
+        clock.now = 25
+        assert queue.pop_due() == ['a', 'b']
+        assert queue.time_to_next() == 5
+        assert len(queue) == 1
+
+    def test_reschedule_replaces_previous(self, scheduler_module):
+        clock = FakeClock()
+        queue = scheduler_module.Scheduler(clock=clock)
+        queue.schedule('a', 10)
+        queue.schedule('a', 100)
+        queue.schedule('b', 0)
+        queue.cancel('b')
+
+        clock.now = 50
+        assert queue.pop_due() == [], (
+            'Перепланированный ключ не должен выбираться по старому сроку.'
+        )
+        clock.now = 100
+        assert queue.pop_due() == ['a']
+        assert queue.time_to_next() is None
+
+    def test_interval_policy(self, scheduler_module):
+        policy = scheduler_module.IntervalPolicy(
+            600, min_interval=60, max_interval=3600, idle_factor=2
+        )
+        assert policy.next_interval(600, scheduler_module.REVIEWING) == 60
+        assert policy.next_interval(600, scheduler_module.IDLE) == 1200
+        assert policy.next_interval(3000, scheduler_module.IDLE) == 3600
+        assert policy.next_interval(60, scheduler_module.THROTTLED) == 1200
+        assert policy.next_interval(60, scheduler_module.CHANGED) == 600
+
+
+class TestTokenBucket:
+
+    def test_bucket_limits_rate(self):
+        from ratelimit import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert bucket.delay() == 0.5
+
+        clock.now = 0.5
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
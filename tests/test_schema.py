@@ -0,0 +1,52 @@
+import pytest
+
+from exceptions import ErrorResponseData, ErrorStatus
+
+
+@pytest.fixture
+def validators(homework_module):
+    return homework_module.VALIDATORS
+
+
+class TestSchema:
+
+    @pytest.mark.parametrize('response, message', [
+        ([], 'Не коректный ответа сервера, результат не словарь'),
+        ({'current_date': 1},
+         'Не корректный ответ сервера, отсутствую параметр(ы): homeworks'),
+        ({}, 'Не корректный ответ сервера, отсутствую параметр(ы): '
+             'homeworks, current_date'),
+        ({'homeworks': {}, 'current_date': 1},
+         'Не коректный ответа сервера, "homeworks" не list'),
+    ])
+    def test_response_errors(self, validators, response, message):
+        with pytest.raises(ErrorResponseData) as info:
+            validators.response(response)
+        assert str(info.value) == message
+
+    def test_response_checks_only_top_level(self, validators):
+        response = {
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved'},
+                {'homework_name': 'hw2', 'status': 'unknown'},
+            ],
+            'current_date': '2023-01-01'
+        }
+        validators.response(response)
+        with pytest.raises(ErrorStatus) as info:
+            validators.homework(response['homeworks'][1])
+        assert str(info.value) == 'Не корректный статус работы: unknown'
+
+    def test_homework_missing_fields(self, validators):
+        with pytest.raises(ErrorResponseData) as info:
+            validators.homework({'id': 1})
+        assert str(info.value) == (
+            'В структуре отсутствуют параметр(ы): homework_name, status'
+        )
+
+    def test_optional_fields_are_typed(self, validators):
+        validators.homework({'homework_name': 'hw', 'status': 'approved',
+                             'reviewer_comment': None, 'id': 5})
+        with pytest.raises(ErrorResponseData):
+            validators.homework({'homework_name': 'hw',
+                                 'status': 'approved', 'id': 'five'})
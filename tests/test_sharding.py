@@ -0,0 +1,137 @@
+from collections import Counter
+
+import pytest
+
+
+@pytest.fixture
+def sharding_module():
+    import sharding
+    return sharding
+
+
+TOKENS = [f'token-{number}' for number in range(4000)]
+
+
+class TestSharding:
+
+    def test_ring_is_balanced_and_stable(self, sharding_module):
+        ring = sharding_module.HashRing(4)
+        owners = [ring.shard_for(token) for token in TOKENS]
+        sizes = Counter(owners)
+        assert set(sizes) == {0, 1, 2, 3}
+        assert min(sizes.values()) > len(TOKENS) / 4 * 0.7
+        again = sharding_module.HashRing(4)
+        assert owners == [again.shard_for(token) for token in TOKENS], (
+            'Шард подписчика не должен меняться между запусками.'
+        )
+
+    def test_adding_shard_moves_about_one_nth(self, sharding_module):
+        before = sharding_module.HashRing(4)
+        after = sharding_module.HashRing(5)
+        moved = [token for token in TOKENS
+                 if before.shard_for(token) != after.shard_for(token)]
+        assert len(moved) < len(TOKENS) / 5 * 1.4
+        assert all(after.shard_for(token) == 4 for token in moved), (
+            'Переезжать должны только подписчики нового шарда.'
+        )
+
+    def test_supervisor_restarts_dead_shards(self, monkeypatch,
+                                             sharding_module):
+        class DeadProcess:
+            exitcode = 1
+
+            def is_alive(self):
+                return False
+
+        supervisor = sharding_module.Supervisor(shards=2)
+        started = []
+        monkeypatch.setattr(supervisor, 'start_shard', started.append)
+        supervisor.processes = {0: DeadProcess(), 1: DeadProcess()}
+        supervisor.processes[1].is_alive = lambda: True
+        supervisor.check_shards()
+        assert started == [0]
+
+    def test_crashing_shard_restarts_with_backoff(self, monkeypatch,
+                                                  sharding_module):
+        import engine
+
+        class DeadProcess:
+            exitcode = 1
+
+            def is_alive(self):
+                return False
+
+        now = [0.0]
+        supervisor = sharding_module.Supervisor(shards=2,
+                                                clock=lambda: now[0])
+        started = []
+
+        def start_shard(shard):
+            started.append(now[0])
+            supervisor.processes[shard] = DeadProcess()
+            supervisor.started[shard] = now[0]
+
+        monkeypatch.setattr(supervisor, 'start_shard', start_shard)
+        supervisor.processes = {0: DeadProcess()}
+        while now[0] < 60:
+            supervisor.check_shards()
+            now[0] += sharding_module.SHARD_RESTART_DELAY
+
+        delay = sharding_module.SHARD_RESTART_DELAY
+        assert started == [0, 3 * delay, 8 * delay], (
+            'Падающий сразу шард перезапускается с нарастающей паузой.'
+        )
+        assert engine.shard_rate(30, (1, 3)) == 10, (
+            'Шарды делят общий лимит запросов поровну.'
+        )
+
+    def test_merged_metrics_have_shard_label(self, sharding_module):
+        import metrics
+
+        supervisor = sharding_module.Supervisor(shards=1)
+        registry = metrics.Registry()
+        registry.counter('polls_total', 'Опросы').inc(3)
+        supervisor.latest[0] = registry.collect()
+        text = supervisor.render()
+        assert 'polls_total{shard="0"} 3' in text
+        assert 'homework_shard_restarts_total' in text
+
+    def test_shard_logs_through_fresh_queue(self, monkeypatch, tmp_path,
+                                            sharding_module):
+        import multiprocessing
+
+        import engine
+        import homework
+        import logs
+        path = tmp_path / 'shard.log'
+
+        def run_engine(mode, shard=None):
+            homework.logger.getChild('engine').error('шард %s работает',
+                                                     shard[0])
+
+        monkeypatch.setattr(engine, 'run_engine', run_engine)
+        monkeypatch.setattr(logs, 'LOG_OUTPUT', str(path))
+        monkeypatch.setattr(logs, 'LOG_QUEUE', True)
+        monkeypatch.setattr(sharding_module, 'publish_metrics',
+                            lambda *args: None)
+        process = multiprocessing.get_context('fork').Process(
+            target=sharding_module.run_shard, args=(1, 2, None)
+        )
+        process.start()
+        process.join(10)
+
+        assert process.exitcode == 0
+        assert 'шард 1 работает' in path.read_text(encoding='utf-8'), (
+            'Записи шарда должны доходить до вывода.'
+        )
+
+    def test_commands_refused_in_sharded_mode(self, monkeypatch,
+                                              sharding_module):
+        import commands
+        import homework
+        monkeypatch.setattr(homework, 'TENANTS_FILE', 'tenants.json')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(commands, 'TELEGRAM_COMMANDS', True)
+        monkeypatch.setattr(sharding_module, 'Supervisor', None)
+        with pytest.raises(SystemExit):
+            sharding_module.run_supervisor()
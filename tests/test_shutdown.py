@@ -0,0 +1,102 @@
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+import telegram
+
+import utils
+
+
+class RecordingBot:
+    def __init__(self, token=None):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def shutdown_module():
+    import shutdown
+    return shutdown
+
+
+def mock_get(requested, on_request=None):
+    def mocked_get(url, headers=None, params=None, **kwargs):
+        requested.append(params['from_date'])
+        if on_request is not None:
+            on_request()
+        response = utils.MockResponseGET(http_status=HTTPStatus.OK)
+        response.json = lambda: {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 100
+        }
+        return response
+    return mocked_get
+
+
+class TestShutdown:
+
+    def test_signal_interrupts_sleep_in_main(self, monkeypatch,
+                                             shutdown_module):
+        import homework
+        requested = []
+        bot = RecordingBot()
+        monkeypatch.setattr(requests, 'get', mock_get(requested))
+        monkeypatch.setattr(telegram, 'Bot', lambda token: bot)
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '12345')
+
+        def sleep_until_signal(seconds):
+            shutdown_module.request_stop()
+            raise AssertionError('Сон должен прерываться сигналом.')
+
+        monkeypatch.setattr(time, 'sleep', sleep_until_signal)
+        homework.main()
+
+        assert len(requested) == 1, 'После сигнала новый опрос не начинается.'
+        assert len(bot.sent) == 1, (
+            'Сообщение начатого опроса должно быть отправлено.'
+        )
+
+    def test_interruptible_skips_wait_after_stop(self, shutdown_module):
+        from exceptions import ShutdownRequested
+        shutdown_module.STOP.set()
+        with pytest.raises(ShutdownRequested):
+            with shutdown_module.interruptible():
+                raise AssertionError('Блок не должен выполняться.')
+        with shutdown_module.graceful():
+            with shutdown_module.interruptible():
+                pass
+
+    def test_engine_drains_outbox_on_stop(self, monkeypatch,
+                                          shutdown_module):
+        import engine
+        import outbox
+        import state
+        import tenants
+        requested = []
+        monkeypatch.setattr(requests, 'get', mock_get(
+            requested, shutdown_module.request_stop
+        ))
+        registry = tenants.TenantRegistry([tenants.Tenant('token', 1)])
+        bot = RecordingBot()
+        store = state.MemoryStateStore()
+        closed = []
+        monkeypatch.setattr(store, 'close', lambda: closed.append(True))
+        polling = engine.PollingEngine(registry, bot, store=store,
+                                       outbox=outbox.Outbox(bot).start())
+        shutdown_module.on_stop(polling.wake)
+
+        polling.run_forever_threaded(workers=2, queue_size=2)
+
+        assert requested == [requested[0]], (
+            'Начатый опрос должен завершиться, новые — не начинаться.'
+        )
+        assert bot.sent == [(1, bot.sent[0][1])], (
+            'Очередь сообщений отправляется до выхода.'
+        )
+        assert store.get_checkpoint(tenants.Tenant('token', 1).key) == 100
+        assert closed, 'Хранилище закрывается при остановке.'
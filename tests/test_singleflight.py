@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from exceptions import ErrorConnection
+
+
+@pytest.fixture
+def singleflight_module():
+    import singleflight
+    return singleflight
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_result(self, singleflight_module):
+        import metrics
+        flights = singleflight_module.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        coalesced = metrics.COALESCED_REQUESTS.labels('sync').value
+
+        def fetch(timestamp):
+            calls.append(timestamp)
+            started.set()
+            release.wait(5)
+            return {'current_date': timestamp}
+
+        with ThreadPoolExecutor(4) as executor:
+            leader = executor.submit(flights.do, ('token', 1), fetch, 1)
+            started.wait(5)
+            followers = [executor.submit(flights.do, ('token', 1), fetch, 1)
+                         for _ in range(3)]
+            other = executor.submit(flights.do, ('token', 2), fetch, 2)
+            while (metrics.COALESCED_REQUESTS.labels('sync').value
+                   < coalesced + 3):
+                time.sleep(0.001)
+            release.set()
+            results = [leader.result()] + [
+                future.result() for future in followers
+            ]
+
+        assert sorted(calls) == [1, 2], (
+            'Одновременные вызовы с одним ключом должны делать один запрос.'
+        )
+        assert all(result is results[0] for result in results), (
+            'Ожидающие должны получать тот же разобранный ответ.'
+        )
+        assert other.result() == {'current_date': 2}
+        assert flights.do(('token', 1), fetch, 1) is not results[0], (
+            'После завершения вызов с тем же ключом выполняется заново.'
+        )
+
+    def test_async_calls_share_error(self, singleflight_module):
+        flights = singleflight_module.SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ErrorConnection('нет связи')
+
+        async def gather():
+            return await asyncio.gather(
+                *(flights.do_async('key', fetch) for _ in range(3)),
+                return_exceptions=True
+            )
+
+        errors = asyncio.run(gather())
+
+        assert len(calls) == 1, 'Асинхронные вызовы тоже объединяются.'
+        assert all(isinstance(error, ErrorConnection) for error in errors), (
+            'Ошибка запроса должна доходить до всех ожидающих.'
+        )
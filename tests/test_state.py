@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def state_module():
+    import state
+    return state
+
+
+class TestState:
+
+    def test_sqlite_store_survives_reopen(self, tmp_path, state_module):
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_module.open_store(path)
+        store.set_checkpoint('tenant', 100)
+        store.set_checkpoint('tenant', 200)
+        store.set_status('tenant', 'hw1', 'reviewing')
+        store.set_status('tenant', 'hw1', 'approved')
+        store.close()
+
+        store = state_module.open_store(path)
+        assert store.get_checkpoint('tenant') == 200, (
+            'После перезапуска опрос должен продолжаться с отметки.'
+        )
+        assert store.get_status('tenant', 'hw1') == 'approved'
+        assert store.get_status('tenant', 'hw2') is None
+        assert store.get_checkpoint('other') is None
+        store.close()
+
+    def test_sqlite_store_uses_wal(self, tmp_path, state_module):
+        store = state_module.SQLiteStateStore(str(tmp_path / 'state.db'))
+        mode = store._connection.execute('PRAGMA journal_mode').fetchone()
+        assert mode[0] == 'wal'
+        store.close()
+
+    def test_memory_store_without_path(self, state_module):
+        store = state_module.open_store(None)
+        assert isinstance(store, state_module.MemoryStateStore)
+        store.set_status('tenant', 'hw1', 'approved')
+        assert store.get_status('tenant', 'hw1') == 'approved'
+
+    def test_homework_table(self, state_module):
+        table = state_module.HomeworkTable(('approved', 'reviewing'))
+        table.set('t1', 'hw1', 'reviewing', 100)
+        table.set('t1', 'hw2', 'approved', 200)
+        table.set('t2', 'hw1', 'rejected', 300)
+        table.set('t1', 'hw1', 'approved', 400)
+
+        assert len(table) == 3
+        assert table.get_status('t1', 'hw1') == 'approved'
+        assert table.get_status('t2', 'hw1') == 'rejected'
+        assert table.get_status('t2', 'hw9', 'нет') == 'нет'
+        record = table.get('t1', 'hw1')
+        assert (record.status, record.updated) == (0, 400), (
+            'Статус хранится индексом в списке статусов.'
+        )
+        assert not hasattr(record, '__dict__')
+        names = [item.homework_name for item in table.tenant_homeworks('t1')]
+        assert names == ['hw1', 'hw2']
+
+    def test_parse_date(self, state_module):
+        assert state_module.parse_date('2020-02-13T14:40:57Z') == 1581604857
+        assert state_module.parse_date(None) == 0
+        assert state_module.parse_date('вчера') == 0
+
+    def test_store_lists_tenant_homeworks(self, tmp_path, state_module):
+        for path in (None, str(tmp_path / 'state.db')):
+            store = state_module.open_store(path)
+            store.set_status('t1', 'hw1', 'approved', 2)
+            store.set_status('t1', 'hw2', 'reviewing', 1)
+            store.set_status('t2', 'hw3', 'reviewing', 1)
+            assert sorted(store.homeworks('t1')) == [
+                ('hw1', 'approved'), ('hw2', 'reviewing')
+            ]
+            store.close()
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def transport_module():
+    import transport
+    yield transport
+    transport.set_session(None)
+
+
+class TestTransport:
+
+    def test_injected_session_is_used(self, transport_module,
+                                      homework_module, random_timestamp):
+        class FakeSession:
+            calls = []
+
+            def get(self, url, **kwargs):
+                self.calls.append(kwargs)
+                response = utils.MockResponseGET(
+                    random_timestamp=random_timestamp
+                )
+                return response
+
+        session = FakeSession()
+        transport_module.set_session(session)
+        answer = homework_module.get_api_answer(random_timestamp)
+
+        assert session.calls, 'Запрос должен идти через внедрённую сессию.'
+        assert answer['current_date'] == random_timestamp
+        timeout = session.calls[0].get('timeout')
+        assert timeout == transport_module.REQUEST_TIMEOUT, (
+            'Запрос к API должен идти с таймаутом.'
+        )
+
+    def test_session_retries_with_jitter(self, transport_module):
+        session = transport_module.create_session(pool_size=4, retries=5,
+                                                  backoff=1)
+        adapter = session.get_adapter('https://practicum.yandex.ru')
+        retry = adapter.max_retries
+
+        assert isinstance(retry, transport_module.JitterRetry)
+        assert retry.total == 5
+        assert HTTPStatus.TOO_MANY_REQUESTS in retry.status_forcelist
+        assert not retry.respect_retry_after_header, (
+            'Сессия не должна спать весь Retry-After в потоке движка.'
+        )
+        assert adapter._pool_maxsize == 4
+
+        for _ in range(3):
+            retry = retry.increment(method='GET', url='/')
+        assert 0 <= retry.get_backoff_time() <= 4
@@ -0,0 +1,165 @@
+"""HTTP-транспорт для обращений к API Практикума."""
+import asyncio
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', 0.5))
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', 30))
+TELEGRAM_TIMEOUT = float(os.getenv('TELEGRAM_TIMEOUT', 20))
+RETRY_STATUSES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+
+ASYNC_POOL_LIMIT = int(os.getenv('ASYNC_POOL_LIMIT', 100))
+ASYNC_POOL_LIMIT_PER_HOST = int(os.getenv('ASYNC_POOL_LIMIT_PER_HOST', 100))
+ASYNC_TIMEOUT = float(os.getenv('ASYNC_TIMEOUT', 30))
+
+# ответ асинхронного запроса: тело в байтах разбирает ResponseCache
+RawResponse = namedtuple('RawResponse',
+                         ('status_code', 'headers', 'content'))
+
+TRANSPORT_ERRORS = (requests.RequestException, asyncio.TimeoutError)
+if aiohttp is not None:
+    TRANSPORT_ERRORS += (aiohttp.ClientError,)
+
+
+class JitterRetry(Retry):
+    """Повтор с экспоненциальной задержкой и случайным разбросом.
+
+    Разброс не даёт множеству подписчиков повторять запросы
+    одновременно после общего сбоя.
+    """
+
+    def get_backoff_time(self):
+        """Случайная задержка от нуля до экспоненциальной."""
+        return random.uniform(0, super().get_backoff_time())
+
+
+def create_session(pool_size: int = HTTP_POOL_SIZE,
+                   retries: int = HTTP_RETRIES,
+                   backoff: float = HTTP_BACKOFF) -> requests.Session:
+    """Сессия с keep-alive, пулом соединений на узел и повторами."""
+    retry = JitterRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+        # Retry-After бывает длиннее таймаута запроса, а сон здесь
+        # блокирует поток движка; паузу после 429 выбирает IntervalPolicy
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session = None
+
+
+def set_session(session):
+    """Подменяем HTTP-сессию, через которую идут запросы к API."""
+    global _session
+    _session = session
+
+
+def get_session():
+    """Текущая сессия; без неё запросы идут через модуль requests."""
+    if _session is None:
+        return requests
+    return _session
+
+
+class AsyncClient:
+    """Общий пул keep-alive соединений для асинхронных запросов.
+
+    При установленном aiohttp запросы идут через один ClientSession
+    с ограничением числа соединений. Без него блокирующие запросы
+    общей requests.Session выполняются в пуле потоков того же размера.
+    """
+
+    def __init__(self, limit: int = ASYNC_POOL_LIMIT,
+                 limit_per_host: int = ASYNC_POOL_LIMIT_PER_HOST,
+                 timeout: float = ASYNC_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+        self._executor = None
+
+    def _aiohttp_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def _blocking_session(self):
+        if self._session is None:
+            self._session = create_session(pool_size=self.limit_per_host)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.limit, thread_name_prefix='http'
+            )
+        return self._session
+
+    async def get(self, url: str, headers: dict, params: dict):
+        """GET-запрос; тело не разбирается, чтобы его проверил кеш."""
+        if aiohttp is not None:
+            session = self._aiohttp_session()
+            async with session.get(url, headers=headers,
+                                   params=params) as response:
+                return RawResponse(response.status, response.headers,
+                                   await response.read())
+
+        session = self._blocking_session()
+
+        def blocking_get():
+            response = session.get(url, headers=headers, params=params,
+                                   timeout=self.timeout)
+            return RawResponse(response.status_code, response.headers,
+                               response.content)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, blocking_get)
+
+    async def close(self):
+        """Закрываем соединения пула."""
+        if self._session is None:
+            return
+        if aiohttp is not None:
+            await self._session.close()
+        else:
+            self._session.close()
+            self._executor.shutdown(wait=False)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()